@@ -1,23 +1,65 @@
+import os
 from sqlmodel import Session
-from typing import List
+from sqlalchemy.exc import SQLAlchemyError
+from typing import Dict, Iterable, List, Optional, Tuple
 
-from app.sql.sql_fxns import get_all_recipes, get_user_ingredients, get_recipe_ingredients, get_cookable_recipes_sql, rmv_frm_cookable_sql
+from app.sql.sql_fxns import get_all_recipes, get_user_ingredients, get_recipe_ingredients, get_cookable_recipes_sql, rmv_frm_cookable_sql, get_cookable_recipe_ids_sql, get_cookable_recipes_among_sql, add_cookable_recipes_sql, rmv_cookable_recipes_sql, get_recipe_ids_using_sql
+from app.chains.recipe_matrix import RecipeRequirementMatrix, get_requirement_matrix
+from app.chains.ingredient_catalog import IngredientCatalog, get_ingredient_catalog
+from app.chains.retreive_recipe import get_recipe_summaries
 
+# "matrix" (in-process requirement matrix), "sql" (set-based query) or "python"
+COOKABILITY_ENGINE = os.getenv("COOKABILITY_ENGINE", "matrix").lower()
 
-def get_cookable_recipes(session: Session, user_id: int) -> List[int]:
-    """
-    Return recipes the user can cook with current stored ingredients.
-    """
 
-    user_ingredients = get_user_ingredients(session, user_id)
-    user_stock = {
+def get_user_stock(session: Session, user_id: int) -> Dict[int, float]:
+    return {
         ing.ingredient_id: ing.amount
-        for ing in user_ingredients
+        for ing in get_user_ingredients(session, user_id)
     }
 
+
+def get_cookable_recipes(session: Session, user_id: int, recipe_ids: Optional[List[int]] = None) -> List[int]:
+    """
+    Return recipes the user can cook with current stored ingredients,
+    optionally only among recipe_ids.
+
+    Uses the in-process requirement matrix or a single set-based query
+    (see COOKABILITY_ENGINE); falls back to the per-recipe Python check
+    if the query fails.
+    """
+    if COOKABILITY_ENGINE == "matrix":
+        cookable = get_requirement_matrix(session).cookable(get_user_stock(session, user_id))
+        if recipe_ids is not None:
+            wanted = set(recipe_ids)
+            cookable = [recipe_id for recipe_id in cookable if recipe_id in wanted]
+        return cookable
+
+    if COOKABILITY_ENGINE == "python":
+        return get_cookable_recipes_python(session, user_id, recipe_ids)
+
+    try:
+        return list(get_cookable_recipe_ids_sql(session, user_id, recipe_ids))
+    except SQLAlchemyError as e:
+        print(f"[WARN] Set-based cookability failed, using Python fallback: {e}")
+        session.rollback()
+        return get_cookable_recipes_python(session, user_id, recipe_ids)
+
+
+def get_cookable_recipes_python(session: Session, user_id: int, recipe_ids: Optional[List[int]] = None) -> List[int]:
+    """
+    Per-recipe cookability check (one requirements query per recipe).
+    """
+
+    user_stock = get_user_stock(session, user_id)
+    wanted = set(recipe_ids) if recipe_ids is not None else None
+
     cookable = []
 
     for recipe in get_all_recipes(session):
+        if wanted is not None and recipe.recipe_id not in wanted:
+            continue
+
         requirements = get_recipe_ingredients(session, recipe.recipe_id)
 
         can_cook = True
@@ -35,23 +77,79 @@ def get_cookable_recipes(session: Session, user_id: int) -> List[int]:
     return cookable
 
 
-def check_cookable_recipes(session: Session, user_id: int):
+def update_cookable_recipes(session: Session, user_id: int, changed_ingredient_ids: Iterable[int]) -> Tuple[List[int], List[int]]:
+    """
+    Incrementally maintain Cookable_recipes after the amounts of
+    changed_ingredient_ids changed: only recipes using those ingredients are
+    re-evaluated, and only the difference is written.
+    Honors COOKABILITY_ENGINE like get_cookable_recipes.
+
+    Returns (added, removed) recipe ids.
+    """
+    changed_ingredient_ids = set(changed_ingredient_ids)
+
+    if COOKABILITY_ENGINE == "matrix":
+        matrix = get_requirement_matrix(session)
+        rows = matrix.rows_using(changed_ingredient_ids)
+        affected = matrix.recipe_ids[rows].tolist()
+        now_cookable = set(matrix.cookable_among(get_user_stock(session, user_id), rows))
+    else:
+        affected = list(get_recipe_ids_using_sql(session, list(changed_ingredient_ids)))
+        now_cookable = set(get_cookable_recipes(session, user_id, affected)) if affected else set()
+
+    if not affected:
+        return [], []
+
+    stored = set(get_cookable_recipes_among_sql(session, user_id, affected))
+
+    added = sorted(now_cookable - stored)
+    removed = sorted(stored - now_cookable)
+
+    add_cookable_recipes_sql(session, user_id, added)
+    rmv_cookable_recipes_sql(session, user_id, removed)
+    session.commit()
+
+    return added, removed
+
+
+def check_cookable_recipes(session: Session, user_id: int, ingredient_ids: Optional[Iterable[int]] = None):
     """
     Remove recipes from Cookable_recipes if the user can no longer cook them.
+    When the consumed ingredient_ids are known, only their recipes are re-checked.
     """
-    user_ingredients = get_user_ingredients(session, user_id)
-    user_stock = {
-        ing.ingredient_id: ing.amount
-        for ing in user_ingredients
-    }
-    for recipe in get_cookable_recipes_sql(session, user_id):
-        requirements = get_recipe_ingredients(session, recipe.recipe_id)
+    if ingredient_ids is not None:
+        update_cookable_recipes(session, user_id, ingredient_ids)
+        return
 
-        for req in requirements:
-            available = user_stock.get(req.ingredient_id, 0)
+    still_cookable = set(get_cookable_recipes(session, user_id))
 
-            if available < req.amount:
-                rmv_frm_cookable_sql( session=session, user_id=user_id, recipe_id=recipe.recipe_id)
-                break  
+    for recipe_id in get_cookable_recipes_sql(session, user_id):
+        if recipe_id not in still_cookable:
+            rmv_frm_cookable_sql( session=session, user_id=user_id, recipe_id=recipe_id)
 
     session.commit() 
+
+
+def get_almost_cookable_recipes(session: Session, user_id: int, k: int = 10, max_missing: Optional[int] = None,
+                                matrix: Optional[RecipeRequirementMatrix] = None,
+                                catalog: Optional[IngredientCatalog] = None) -> List[dict]:
+    """
+    Recipes the user is closest to being able to cook, best first, each
+    with its summary and the missing ingredients (name, unit, shortfall).
+    Async callers pass matrix/catalog from the async accessors.
+    """
+    matrix = matrix or get_requirement_matrix(session)
+    near = matrix.near_misses(get_user_stock(session, user_id), k=k, max_missing=max_missing)
+    if not near:
+        return []
+
+    catalog = catalog or get_ingredient_catalog(session)
+    summaries = {s["recipe_id"]: s for s in get_recipe_summaries(session, [n["recipe_id"] for n in near])}
+
+    out = []
+    for entry in near:
+        for item in entry["missing"]:
+            item["ingredient_name"] = catalog.name_map.get(item["ingredient_id"])
+            item["unit"] = catalog.unit_map.get(item["ingredient_id"])
+        out.append({**summaries.get(entry["recipe_id"], {"recipe_id": entry["recipe_id"]}), **entry})
+    return out
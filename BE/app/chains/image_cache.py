@@ -0,0 +1,123 @@
+import asyncio
+import hashlib
+import json
+import os
+from typing import Awaitable, Callable, Dict, Optional
+
+from app.core.cache import LRUCache
+from app.chains.img_to_ingredients import StructuredOutput, CHAIN_VERSION
+
+IMAGE_CACHE_SIZE = int(os.getenv("IMAGE_CACHE_SIZE", "512"))
+# Directory for the on-disk tier ("" disables it)
+IMAGE_CACHE_DIR = os.getenv("IMAGE_CACHE_DIR", "")
+
+
+class _Inflight:
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+# =========================================================
+# --------------- Fridge Analysis Cache -------------------
+# =========================================================
+
+class ImageAnalysisCache:
+    """
+    Vision results keyed by a hash of the normalized (preprocessed) image
+    bytes plus the prompt/model version.
+
+    Tiers: bounded in-memory LRU, then optional JSON files in IMAGE_CACHE_DIR.
+    Concurrent requests for the same image share a single model call.
+    """
+
+    def __init__(self, maxsize: int = IMAGE_CACHE_SIZE, directory: str = IMAGE_CACHE_DIR, version: str = CHAIN_VERSION):
+        self.memory = LRUCache(maxsize)
+        self.directory = directory
+        self.version = version
+        self.disk_hits = 0
+        self.shared_calls = 0
+        self._inflight: Dict[str, _Inflight] = {}
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def make_key(self, image_bytes: bytes) -> str:
+        return hashlib.sha256(self.version.encode("utf-8") + b":" + image_bytes).hexdigest()
+
+    # ------------- disk tier -------------
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def _disk_get(self, key: str) -> Optional[dict]:
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _disk_set(self, key: str, value: dict) -> None:
+        tmp = self._path(key) + ".tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(value, f)
+            os.replace(tmp, self._path(key))
+        except OSError as e:
+            print(f"[WARN] Image cache write failed: {e}")
+
+    # ---------------- public ----------------
+
+    async def get_or_analyze(self, image_bytes: bytes, analyze: Callable[[], Awaitable[StructuredOutput]]) -> StructuredOutput:
+        key = self.make_key(image_bytes)
+
+        cached = self.memory.get(key)
+        if cached is not None:
+            return StructuredOutput.model_validate(cached)
+
+        if self.directory:
+            cached = await asyncio.to_thread(self._disk_get, key)
+            if cached is not None:
+                self.disk_hits += 1
+                self.memory.set(key, cached)
+                return StructuredOutput.model_validate(cached)
+
+        inflight = self._inflight.get(key)
+        if inflight is None:
+            inflight = self._inflight[key] = _Inflight(asyncio.create_task(self._analyze_and_store(key, analyze)))
+        else:
+            self.shared_calls += 1
+
+        # The model call runs in its own task: one caller being cancelled
+        # only cancels the call once nobody else is waiting for it.
+        inflight.waiters += 1
+        try:
+            return StructuredOutput.model_validate(await asyncio.shield(inflight.task))
+        except asyncio.CancelledError:
+            if inflight.waiters == 1 and not inflight.task.done():
+                inflight.task.cancel()
+                # later callers start a fresh call instead of joining a cancelled one
+                self._drop_inflight(key, inflight.task)
+            raise
+        finally:
+            inflight.waiters -= 1
+
+    async def _analyze_and_store(self, key: str, analyze: Callable[[], Awaitable[StructuredOutput]]) -> dict:
+        try:
+            value = (await analyze()).model_dump()
+            self.memory.set(key, value)
+            if self.directory:
+                await asyncio.to_thread(self._disk_set, key, value)
+            return value
+        finally:
+            self._drop_inflight(key, asyncio.current_task())
+
+    def _drop_inflight(self, key: str, task: asyncio.Task) -> None:
+        inflight = self._inflight.get(key)
+        if inflight is not None and inflight.task is task:
+            del self._inflight[key]
+
+    def stats(self) -> dict:
+        return {**self.memory.stats(), "disk_hits": self.disk_hits, "shared_calls": self.shared_calls}
+
+
+image_analysis_cache = ImageAnalysisCache()
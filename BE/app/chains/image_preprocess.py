@@ -0,0 +1,66 @@
+import asyncio
+import io
+import os
+from typing import Tuple
+
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+# Longest edge sent to the vision model; larger photos are downscaled
+IMAGE_MAX_EDGE = int(os.getenv("IMAGE_MAX_EDGE", "1024"))
+# Re-encoding format: JPEG or WEBP
+IMAGE_OUTPUT_FORMAT = os.getenv("IMAGE_OUTPUT_FORMAT", "JPEG").upper()
+IMAGE_QUALITY = int(os.getenv("IMAGE_QUALITY", "85"))
+# Largest decoded size accepted. The default (8x IMAGE_MAX_EDGE per side, ~67 MP
+# at 1024) covers any phone camera; beyond it we would only be decoding pixels
+# that thumbnail() throws away, and small files can claim huge sizes.
+IMAGE_MAX_PIXELS = int(os.getenv("IMAGE_MAX_PIXELS", str((8 * IMAGE_MAX_EDGE) ** 2)))
+
+_MIME_TYPES = {"JPEG": "image/jpeg", "WEBP": "image/webp"}
+
+
+# =========================================================
+# ------------------ Image Preprocessing ------------------
+# =========================================================
+
+def preprocess_image(image_bytes: bytes) -> Tuple[bytes, str]:
+    """
+    Prepare an uploaded photo for the vision model:
+    - detect the real format (raises ValueError if it is not an image
+      or has more than IMAGE_MAX_PIXELS pixels)
+    - apply the EXIF orientation, then drop all metadata
+    - downscale so the longest edge is at most IMAGE_MAX_EDGE
+    - re-encode as compact JPEG/WEBP
+
+    Returns (bytes, mime_type).
+    """
+    try:
+        img = Image.open(io.BytesIO(image_bytes))
+        # size comes from the header; check it before decoding anything
+        if img.width * img.height > IMAGE_MAX_PIXELS:
+            raise ValueError(f"Image too large: {img.width}x{img.height} exceeds {IMAGE_MAX_PIXELS} pixels")
+        img.load()
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError) as e:
+        raise ValueError(f"Unsupported image: {e}") from e
+
+    img = ImageOps.exif_transpose(img)
+    if max(img.size) > IMAGE_MAX_EDGE:
+        img.thumbnail((IMAGE_MAX_EDGE, IMAGE_MAX_EDGE), Image.Resampling.LANCZOS)
+
+    if img.mode not in ("RGB", "L"):
+        # flatten transparency on white (JPEG has no alpha)
+        background = Image.new("RGB", img.size, (255, 255, 255))
+        rgba = img.convert("RGBA")
+        background.paste(rgba, mask=rgba.getchannel("A"))
+        img = background
+
+    # saved without exif=..., so no metadata survives
+    out = io.BytesIO()
+    img.save(out, format=IMAGE_OUTPUT_FORMAT, quality=IMAGE_QUALITY, optimize=True)
+    return out.getvalue(), _MIME_TYPES[IMAGE_OUTPUT_FORMAT]
+
+
+async def apreprocess_image(image_bytes: bytes) -> Tuple[bytes, str]:
+    """
+    preprocess_image off the event loop (decoding/resizing is CPU bound).
+    """
+    return await asyncio.to_thread(preprocess_image, image_bytes)
@@ -1,9 +1,10 @@
-from langchain_openai import ChatOpenAI
+from app.chains.llm_provider import get_chat_model, get_llm_provider
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.output_parsers import StrOutputParser
 from pydantic import BaseModel, Field
 from langchain_core.output_parsers import PydanticOutputParser
 from typing import Literal
+import hashlib
 
 from dotenv import load_dotenv; load_dotenv()
 
@@ -47,17 +48,19 @@ prompt = ChatPromptTemplate.from_messages([
                 "- Cans → kg"
                 "- Never output other unit strings"),
     ("human", [ {"type": "text", "text": "{task_description}"},
-                {"type": "image_url", "image_url": {"url": "data:image/png;base64,{image_base64}"}},
+                {"type": "image_url", "image_url": {"url": "data:{image_mime};base64,{image_base64}"}},
                 {"type": "text", "text": "{format_output_instructions}"}])
 ]).partial(format_output_instructions=format_instructions, task_description = Task_Discription)
 
 
 # ---------- Vision model ----------
 
-llm = ChatOpenAI(
-    model="gpt-4o-mini",
-    temperature=0
-)
+VISION_MODEL = "gpt-4o-mini"
+
+llm = get_chat_model(VISION_MODEL, temperature=0)
+
+# Changes whenever the prompt, output schema or model changes (cache key for image_cache)
+CHAIN_VERSION = hashlib.sha1(f"{get_llm_provider()}:{VISION_MODEL}|{prompt.messages!r}|{format_instructions}".encode("utf-8")).hexdigest()[:12]
 
 
 # ---------- Runnable chain ----------
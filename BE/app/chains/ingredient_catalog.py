@@ -0,0 +1,125 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.sql.sql_fxns import get_ingredient_table
+from app.chains.ingredient_resolver import IngredientResolver
+
+
+# Seconds before the snapshot is reloaded from the DB (0 = never expires)
+INGREDIENT_CATALOG_TTL = float(os.getenv("INGREDIENT_CATALOG_TTL", "600"))
+
+
+# =========================================================
+# ------------------ Catalog Snapshot ---------------------
+# =========================================================
+
+class IngredientCatalog:
+    """
+    Immutable snapshot of the ingredients table:
+    - ingredient_list (sorted by length DESC for LLM resolution)
+    - ingredient_map (case-insensitive name -> id)
+    - name_map (id -> DB name)
+    - unit_map (id -> DB presentation unit)
+    - ingredient_list_json (ingredient_list pre-serialized for prompts)
+
+    version is a hash of the table contents, so it only changes when the
+    ingredients themselves change.
+    """
+
+    def __init__(self, ingredients):
+        rows = sorted((ing.ingredient_id, ing.ingredient_name, ing.measuring_unit) for ing in ingredients)
+
+        self.ingredient_list: List[str] = sorted(
+            [name for _, name, _ in rows],
+            key=len,
+            reverse=True
+        )
+        self.ingredient_map: Dict[str, int] = {
+            name.lower(): ing_id
+            for ing_id, name, _ in rows
+        }
+        self.name_map: Dict[int, str] = {
+            ing_id: name
+            for ing_id, name, _ in rows
+        }
+        self.unit_map: Dict[int, str] = {
+            ing_id: unit.lower()
+            for ing_id, _, unit in rows
+        }
+        self.ingredient_list_json = json.dumps(self.ingredient_list)
+
+        self.version = hashlib.sha1(json.dumps(rows).encode("utf-8")).hexdigest()[:12]
+        self.built_at = time.monotonic()
+        self._resolver: Optional[IngredientResolver] = None
+
+    @classmethod
+    def from_db(cls, session: Session) -> "IngredientCatalog":
+        return cls(get_ingredient_table(session))
+
+    @property
+    def resolver(self) -> IngredientResolver:
+        """
+        Local fuzzy resolver over this snapshot, built on first use.
+        """
+        if self._resolver is None:
+            self._resolver = IngredientResolver(self.ingredient_list)
+        return self._resolver
+
+    def is_expired(self) -> bool:
+        return INGREDIENT_CATALOG_TTL > 0 and time.monotonic() - self.built_at > INGREDIENT_CATALOG_TTL
+
+
+# =========================================================
+# ------------- Process-wide Snapshot ---------------------
+# =========================================================
+
+_catalog: Optional[IngredientCatalog] = None
+# Guards the swap only. Never hold it across DB I/O: under session.run_sync
+# that I/O yields to the event loop, and a second request blocking on the
+# lock would then block the loop thread itself.
+_catalog_lock = threading.Lock()
+
+
+def get_ingredient_catalog(session: Session) -> IngredientCatalog:
+    """
+    Return the current catalog snapshot, (re)loading it if missing or expired.
+    Concurrent reloads may both hit the DB; the first one to finish wins.
+    """
+    global _catalog
+    catalog = _catalog
+    if catalog is not None and not catalog.is_expired():
+        return catalog
+
+    loaded = IngredientCatalog.from_db(session)
+    with _catalog_lock:
+        if _catalog is None or _catalog.is_expired():
+            _catalog = loaded
+        return _catalog
+
+
+async def aget_ingredient_catalog(session: AsyncSession) -> IngredientCatalog:
+    """
+    Async variant of get_ingredient_catalog; only touches the DB on reload.
+    """
+    catalog = _catalog
+    if catalog is not None and not catalog.is_expired():
+        return catalog
+    return await session.run_sync(get_ingredient_catalog)
+
+
+def refresh_ingredient_catalog(session: Optional[Session] = None) -> None:
+    """
+    Call whenever the ingredients table changes.
+    Drops the snapshot; reloads it now if a session is given.
+    """
+    global _catalog
+    loaded = IngredientCatalog.from_db(session) if session is not None else None
+    with _catalog_lock:
+        _catalog = loaded
@@ -0,0 +1,166 @@
+import os
+import re
+import unicodedata
+from typing import Dict, List, Set
+
+# Minimum confidence for a local match to skip the LLM
+INGREDIENT_RESOLVER_THRESHOLD = float(os.getenv("INGREDIENT_RESOLVER_THRESHOLD", "0.9"))
+
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+
+
+# =========================================================
+# ------------------- Normalization -----------------------
+# =========================================================
+
+def normalize_name(text: str) -> str:
+    """
+    'Crème  Fraîche!' -> 'creme fraiche'
+    """
+    text = unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode("ascii")
+    return _NON_ALNUM.sub(" ", text.lower()).strip()
+
+
+def singularize(word: str) -> str:
+    """
+    Cheap English plural stripping, good enough for ingredient names.
+    """
+    if len(word) <= 3:
+        return word
+    if word.endswith("ies"):
+        return word[:-3] + "y"
+    if word.endswith("oes"):
+        return word[:-2]
+    if word.endswith(("ches", "shes", "sses", "xes")):
+        return word[:-2]
+    if word.endswith("s") and not word.endswith(("ss", "us", "is")):
+        return word[:-1]
+    return word
+
+
+def name_key(text: str) -> str:
+    return " ".join(singularize(w) for w in normalize_name(text).split())
+
+
+def trigrams(key: str) -> Set[str]:
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+# =========================================================
+# --------------------- Resolver --------------------------
+# =========================================================
+
+class IngredientResolver:
+    """
+    Deterministic resolution of raw ingredient names against the catalog.
+
+    Stages, in order:
+    1. exact match on the normalized name
+    2. match after plural stripping
+    3. token containment (catalog name fully contained in the raw name)
+    4. trigram similarity
+
+    Whenever several names fit, the LONGER one wins (honeydew -> Honeydew,
+    NOT Honey), mirroring the rule given to resolve_ingredient_llm.
+
+    resolve() returns the same shape as resolve_ingredient_llm plus a
+    confidence score; anything below the threshold comes back UNKNOWN
+    with candidates so the caller can escalate.
+    """
+
+    def __init__(self, ingredient_names: List[str], threshold: float = INGREDIENT_RESOLVER_THRESHOLD):
+        self.threshold = threshold
+        self.names = sorted(set(ingredient_names), key=len, reverse=True)
+
+        self.by_normalized: Dict[str, str] = {}
+        self.by_key: Dict[str, str] = {}
+        self.token_index: Dict[str, Set[int]] = {}
+        self.trigram_index: Dict[str, Set[int]] = {}
+        self.keys: List[str] = []
+        self.key_tokens: List[Set[str]] = []
+        self.key_trigrams: List[Set[str]] = []
+
+        # names are longest first, so setdefault keeps the longer name on collisions
+        for idx, name in enumerate(self.names):
+            key = name_key(name)
+            self.by_normalized.setdefault(normalize_name(name), name)
+            self.by_key.setdefault(key, name)
+
+            tokens = set(key.split())
+            grams = trigrams(key)
+            self.keys.append(key)
+            self.key_tokens.append(tokens)
+            self.key_trigrams.append(grams)
+
+            for token in tokens:
+                self.token_index.setdefault(token, set()).add(idx)
+            for gram in grams:
+                self.trigram_index.setdefault(gram, set()).add(idx)
+
+    def _result(self, name: str | None, confidence: float, method: str, candidates: List[str]) -> dict:
+        resolved = name is not None and confidence >= self.threshold
+        return {
+            "status": "RESOLVED" if resolved else "UNKNOWN",
+            "ingredient_name": name if resolved else None,
+            "candidates": candidates,
+            "confidence": round(confidence, 3),
+            "method": method,
+        }
+
+    def resolve(self, raw_name: str) -> dict:
+        normalized = normalize_name(raw_name)
+        if not normalized:
+            return self._result(None, 0.0, "empty", [])
+
+        # 1. Exact
+        name = self.by_normalized.get(normalized)
+        if name is not None:
+            return self._result(name, 1.0, "exact", [name])
+
+        # 2. Plural stripping
+        key = name_key(normalized)
+        name = self.by_key.get(key)
+        if name is not None:
+            return self._result(name, 1.0, "singular", [name])
+
+        tokens = set(key.split())
+
+        # 3. Token containment: catalog names whose tokens all appear in the raw name
+        contained = set()
+        for token in tokens:
+            for idx in self.token_index.get(token, ()):
+                if self.key_tokens[idx] <= tokens:
+                    contained.add(idx)
+
+        # 4. Trigram similarity (Jaccard) over names sharing at least one trigram
+        grams = trigrams(key)
+        shared: Dict[int, int] = {}
+        for gram in grams:
+            for idx in self.trigram_index.get(gram, ()):
+                shared[idx] = shared.get(idx, 0) + 1
+
+        scored = []
+        for idx, overlap in shared.items():
+            similarity = overlap / (len(grams) + len(self.key_trigrams[idx]) - overlap)
+            if idx in contained:
+                # a contained name is at least as good as its share of the raw name
+                similarity = max(similarity, len(self.keys[idx]) / len(key))
+            scored.append((similarity, len(self.names[idx]), idx))
+
+        if not scored:
+            return self._result(None, 0.0, "none", [])
+
+        # best score first, longer name first on ties
+        scored.sort(reverse=True)
+        candidates = [self.names[idx] for _, _, idx in scored[:5]]
+        best_score, _, best_idx = scored[0]
+
+        # refuse to pick between two near-equal names unless the longer one contains the other
+        if len(scored) > 1 and best_score - scored[1][0] < 0.05:
+            runner_up = scored[1][2]
+            if self.keys[runner_up] not in self.keys[best_idx]:
+                return self._result(None, best_score, "ambiguous", candidates)
+
+        method = "token" if best_idx in contained else "trigram"
+        return self._result(self.names[best_idx], best_score, method, candidates)
@@ -0,0 +1,243 @@
+import os
+import threading
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.sql.sql_fxns import get_all_recipes, get_all_recipe_ingredients, get_recipe_requirements_fingerprint
+
+# Seconds between checks that the matrix still matches the recipe tables
+# (0 = never check; rely on refresh_requirement_matrix)
+REQUIREMENT_MATRIX_TTL = float(os.getenv("REQUIREMENT_MATRIX_TTL", "60"))
+
+
+# =========================================================
+# --------------- Requirement Matrix ----------------------
+# =========================================================
+
+class RecipeRequirementMatrix:
+    """
+    Sparse recipes x ingredients matrix of required amounts (CSR layout).
+
+    Row i holds the requirements of recipe_ids[i]:
+    indices[indptr[i]:indptr[i+1]] are ingredient columns and
+    amounts[indptr[i]:indptr[i+1]] the amounts needed.
+    """
+
+    def __init__(self, recipe_ids: List[int], requirements: Dict[int, Dict[int, float]], version: int = 0,
+                 fingerprint: Optional[Tuple] = None):
+        self.version = version
+        self.fingerprint = fingerprint
+        self.checked_at = time.monotonic()
+        self.recipe_ids = np.asarray(sorted(recipe_ids), dtype=np.int64)
+
+        ingredient_ids = sorted({ing_id for reqs in requirements.values() for ing_id in reqs})
+        self.ingredient_ids = np.asarray(ingredient_ids, dtype=np.int64)
+        self.ingredient_index = {ing_id: col for col, ing_id in enumerate(ingredient_ids)}
+
+        indptr = [0]
+        indices = []
+        amounts = []
+        for recipe_id in self.recipe_ids.tolist():
+            reqs = requirements.get(recipe_id, {})
+            for ing_id, amount in reqs.items():
+                indices.append(self.ingredient_index[ing_id])
+                amounts.append(amount)
+            indptr.append(len(indices))
+
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.indices = np.asarray(indices, dtype=np.int64)
+        self.amounts = np.asarray(amounts, dtype=np.float64)
+
+        # row number of every stored requirement, used to aggregate per recipe
+        self.row_of = np.repeat(np.arange(len(self.recipe_ids)), np.diff(self.indptr))
+
+        # inverted index (CSC layout): rows using column j are
+        # col_rows[col_indptr[j]:col_indptr[j+1]]
+        order = np.argsort(self.indices, kind="stable")
+        self.col_rows = self.row_of[order]
+        self.col_indptr = np.concatenate(([0], np.cumsum(np.bincount(self.indices, minlength=len(self.ingredient_ids)))))
+
+    @classmethod
+    def from_db(cls, session: Session, version: int = 0) -> "RecipeRequirementMatrix":
+        # taken before the data: a concurrent write makes the next check rebuild
+        fingerprint = get_recipe_requirements_fingerprint(session)
+        recipe_ids = [recipe.recipe_id for recipe in get_all_recipes(session)]
+
+        requirements: Dict[int, Dict[int, float]] = {}
+        for req in get_all_recipe_ingredients(session):
+            requirements.setdefault(req.recipe_id, {})[req.ingredient_id] = float(req.amount)
+
+        return cls(recipe_ids, requirements, version=version, fingerprint=fingerprint)
+
+    def needs_check(self) -> bool:
+        return REQUIREMENT_MATRIX_TTL > 0 and time.monotonic() - self.checked_at > REQUIREMENT_MATRIX_TTL
+
+    @property
+    def shape(self):
+        return len(self.recipe_ids), len(self.ingredient_ids)
+
+    def stock_vector(self, user_stock: Dict[int, float]) -> np.ndarray:
+        """
+        Dense stock vector aligned with the matrix columns.
+        Ingredients unknown to any recipe are ignored.
+        """
+        vec = np.zeros(len(self.ingredient_ids), dtype=np.float64)
+        for ing_id, amount in user_stock.items():
+            col = self.ingredient_index.get(ing_id)
+            if col is not None:
+                vec[col] += float(amount)
+        return vec
+
+    def cookable_mask(self, user_stock: Dict[int, float]) -> np.ndarray:
+        """
+        Boolean mask over recipe_ids: True where every requirement is met.
+        """
+        stock = self.stock_vector(user_stock)
+        short = stock[self.indices] < self.amounts
+        short_count = np.bincount(self.row_of[short], minlength=len(self.recipe_ids))
+        return short_count == 0
+
+    def cookable(self, user_stock: Dict[int, float]) -> List[int]:
+        return self.recipe_ids[self.cookable_mask(user_stock)].tolist()
+
+    def rows_using(self, ingredient_ids: Iterable[int]) -> np.ndarray:
+        """
+        Rows (sorted, unique) of the recipes that need any of ingredient_ids.
+        """
+        cols = [self.ingredient_index[i] for i in ingredient_ids if i in self.ingredient_index]
+        if not cols:
+            return np.empty(0, dtype=np.int64)
+        return np.unique(np.concatenate([
+            self.col_rows[self.col_indptr[c]:self.col_indptr[c + 1]] for c in cols
+        ]))
+
+    def cookable_among(self, user_stock: Dict[int, float], rows: np.ndarray) -> List[int]:
+        """
+        Like cookable(), but only evaluates the given rows.
+        """
+        if rows.size == 0:
+            return []
+
+        starts = self.indptr[rows]
+        lengths = self.indptr[rows + 1] - starts
+        # positions of every requirement of the selected rows, row after row
+        positions = np.repeat(starts - (np.cumsum(lengths) - lengths), lengths) + np.arange(lengths.sum())
+        local_row = np.repeat(np.arange(len(rows)), lengths)
+
+        stock = self.stock_vector(user_stock)
+        short = stock[self.indices[positions]] < self.amounts[positions]
+        short_count = np.bincount(local_row[short], minlength=len(rows))
+        return self.recipe_ids[rows[short_count == 0]].tolist()
+
+    def near_misses(self, user_stock: Dict[int, float], k: int = 10, max_missing: Optional[int] = None) -> List[dict]:
+        """
+        The k recipes closest to cookable: fewest missing ingredients first,
+        then smallest missing fraction. Cookable recipes are excluded.
+        Uses np.argpartition so only the k best rows get sorted.
+        """
+        stock = self.stock_vector(user_stock)
+        shortfall = np.maximum(self.amounts - stock[self.indices], 0.0)
+        missing = shortfall > 0
+
+        missing_count = np.bincount(self.row_of[missing], minlength=len(self.recipe_ids))
+        required_count = np.diff(self.indptr)
+
+        candidates = missing_count > 0
+        if max_missing is not None:
+            candidates &= missing_count <= max_missing
+        rows = np.flatnonzero(candidates)
+        if rows.size == 0 or k <= 0:
+            return []
+
+        fraction = missing_count[rows] / required_count[rows]
+        # fraction <= 1, so this orders by count first, then fraction
+        score = missing_count[rows] + fraction
+        if rows.size > k:
+            # keep everything tied with the k-th score so ties break by recipe_id
+            kth = score[np.argpartition(score, k - 1)[k - 1]]
+            best = score <= kth
+            rows, fraction, score = rows[best], fraction[best], score[best]
+        order = np.lexsort((self.recipe_ids[rows], score))[:k]
+
+        out = []
+        for row, frac in zip(rows[order].tolist(), fraction[order].tolist()):
+            start, end = self.indptr[row], self.indptr[row + 1]
+            short = np.flatnonzero(missing[start:end]) + start
+            out.append({
+                "recipe_id": int(self.recipe_ids[row]),
+                "missing_count": int(missing_count[row]),
+                "required_count": int(required_count[row]),
+                "missing_fraction": round(frac, 3),
+                "missing": [
+                    {"ingredient_id": int(self.ingredient_ids[col]), "shortfall": round(float(amount), 2)}
+                    for col, amount in zip(self.indices[short].tolist(), shortfall[short].tolist())
+                ],
+            })
+        return out
+
+
+# =========================================================
+# ------------- Process-wide Lazy Instance ----------------
+# =========================================================
+
+_matrix: Optional[RecipeRequirementMatrix] = None
+_matrix_version = 0
+# Guards the swap only, never DB I/O (see ingredient_catalog._catalog_lock).
+_matrix_lock = threading.Lock()
+
+
+def get_requirement_matrix(session: Session) -> RecipeRequirementMatrix:
+    """
+    Return the shared requirement matrix, building it on first use.
+
+    Every REQUIREMENT_MATRIX_TTL seconds a fingerprint query over
+    recipes / recipe_ingredients checks the matrix against the DB and
+    rebuilds it only if something changed. This covers recipe writes from
+    other processes, e.g. a catalog import; in-process writers can call
+    refresh_requirement_matrix to apply changes immediately.
+    """
+    global _matrix, _matrix_version
+    matrix = _matrix
+    if matrix is not None and not matrix.needs_check():
+        return matrix
+
+    if matrix is not None and get_recipe_requirements_fingerprint(session) == matrix.fingerprint:
+        matrix.checked_at = time.monotonic()
+        return matrix
+
+    rebuilt = RecipeRequirementMatrix.from_db(session)
+    with _matrix_lock:
+        # unless a concurrent rebuild already replaced the matrix we started from
+        if _matrix is matrix or _matrix is None:
+            _matrix_version += 1
+            rebuilt.version = _matrix_version
+            _matrix = rebuilt
+        return _matrix
+
+
+async def aget_requirement_matrix(session: AsyncSession) -> RecipeRequirementMatrix:
+    """
+    Async variant of get_requirement_matrix; only touches the DB on checks/rebuilds.
+    """
+    matrix = _matrix
+    if matrix is not None and not matrix.needs_check():
+        return matrix
+    return await session.run_sync(get_requirement_matrix)
+
+
+def refresh_requirement_matrix(session: Optional[Session] = None) -> None:
+    """
+    Call whenever recipes or recipe_ingredients change.
+    Drops the cached matrix; rebuilds it now if a session is given.
+    """
+    global _matrix, _matrix_version
+    rebuilt = RecipeRequirementMatrix.from_db(session) if session is not None else None
+    with _matrix_lock:
+        _matrix_version += 1
+        if rebuilt is not None:
+            rebuilt.version = _matrix_version
+        _matrix = rebuilt
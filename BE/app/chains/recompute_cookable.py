@@ -0,0 +1,141 @@
+"""
+Recompute cookable_recipes for every user, e.g. after a catalog import.
+
+    python -m app.chains.recompute_cookable [--chunk-size 2000] [--workers 4] [--dry-run]
+
+Users are processed in chunks. Each chunk runs one set-based cookability
+query, diffs the result against the stored rows, and writes only the
+differences. Chunks run in parallel in a process pool.
+
+Recipes are selected with sql_fxns.cookable_recipe_filter, which only
+excludes the ingredient-less seed recipes (71-83), so recipes added by a
+catalog import are materialized on the next run.
+
+Writes use INSERT ... ON CONFLICT (user_id, recipe_id), which needs the
+UNIQUE (user_id, recipe_id) constraint on cookable_recipes from
+DB/schema.sql. Existing databases must be recreated (docker compose down -v)
+or altered:
+    ALTER TABLE cookable_recipes ADD UNIQUE (user_id, recipe_id);
+"""
+
+import argparse
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import List, Tuple
+
+from sqlmodel import Session
+
+from app.DB import engine
+from app.sql.sql_fxns import (
+    get_user_ids_page,
+    get_cookable_pairs_for_users_sql,
+    get_recipes_without_requirements_sql,
+    get_cookable_pairs_sql,
+    add_cookable_pairs_bulk,
+    rmv_cookable_pairs_bulk,
+)
+
+RECOMPUTE_CHUNK_SIZE = int(os.getenv("RECOMPUTE_CHUNK_SIZE", "2000"))
+RECOMPUTE_WORKERS = int(os.getenv("RECOMPUTE_WORKERS", str(os.cpu_count() or 1)))
+# Rows per INSERT/DELETE statement, keeps bind parameters well under Postgres' limit
+WRITE_BATCH_SIZE = 10_000
+
+
+def _batches(rows: List, size: int = WRITE_BATCH_SIZE):
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+
+def _init_worker() -> None:
+    # Connections inherited from the parent process must not be reused
+    engine.dispose(close=False)
+
+
+def recompute_chunk(user_ids: List[int], dry_run: bool = False) -> Tuple[int, int, int]:
+    """
+    Recompute and store cookability for one chunk of users.
+    Returns (users, added, removed).
+    """
+    with Session(engine) as session:
+        wanted = set(get_cookable_pairs_for_users_sql(session, user_ids))
+        always = get_recipes_without_requirements_sql(session)
+        wanted.update((user_id, recipe_id) for user_id in user_ids for recipe_id in always)
+
+        stored = set(get_cookable_pairs_sql(session, user_ids))
+        added = sorted(wanted - stored)
+        removed = sorted(stored - wanted)
+
+        if not dry_run:
+            for batch in _batches(removed):
+                rmv_cookable_pairs_bulk(session, batch)
+            for batch in _batches(added):
+                add_cookable_pairs_bulk(session, batch)
+            session.commit()
+
+    return len(user_ids), len(added), len(removed)
+
+
+def _user_chunks(chunk_size: int):
+    after_user_id = 0
+    while True:
+        # one short session per page: no transaction stays open while the workers write
+        with Session(engine) as session:
+            user_ids = get_user_ids_page(session, after_user_id, chunk_size)
+        if not user_ids:
+            return
+        yield user_ids
+        after_user_id = user_ids[-1]
+
+
+def recompute_all(chunk_size: int = RECOMPUTE_CHUNK_SIZE, workers: int = RECOMPUTE_WORKERS,
+                  dry_run: bool = False) -> dict:
+    """
+    Recompute every user's cookable recipes. At most 2 * workers chunks are
+    in flight, so memory stays flat however many users there are.
+    """
+    started = time.perf_counter()
+    totals = {"users": 0, "added": 0, "removed": 0, "chunks": 0}
+
+    def report(done) -> None:
+        for future in done:
+            users, added, removed = future.result()
+            totals["users"] += users
+            totals["added"] += added
+            totals["removed"] += removed
+            totals["chunks"] += 1
+        elapsed = time.perf_counter() - started
+        print(
+            f"[recompute] {totals['users']} users, +{totals['added']} / -{totals['removed']} recipes "
+            f"in {elapsed:.1f}s ({totals['users'] / elapsed:.0f} users/s)",
+            flush=True,
+        )
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+        pending = set()
+        for user_ids in _user_chunks(chunk_size):
+            pending.add(pool.submit(recompute_chunk, user_ids, dry_run))
+            if len(pending) >= 2 * workers:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                report(done)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            report(done)
+
+    totals["seconds"] = round(time.perf_counter() - started, 2)
+    return totals
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Recompute cookable recipes for all users.")
+    parser.add_argument("--chunk-size", type=int, default=RECOMPUTE_CHUNK_SIZE)
+    parser.add_argument("--workers", type=int, default=RECOMPUTE_WORKERS)
+    parser.add_argument("--dry-run", action="store_true", help="compute the diff without writing it")
+    args = parser.parse_args(argv)
+
+    totals = recompute_all(args.chunk_size, args.workers, args.dry_run)
+    print(f"[recompute] done: {totals}")
+
+
+if __name__ == "__main__":
+    main()
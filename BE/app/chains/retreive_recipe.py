@@ -1,5 +1,48 @@
+import os
 from sqlmodel import Session, select
+from typing import Dict, List, Optional
 from app.sql.sql_models import *
+from app.core.cache import CacheBackend, LRUCache, TieredCache
+
+
+# =========================================================
+# ------------------- Recipe Cache ------------------------
+# =========================================================
+
+# Recipe documents are seed data and practically never change, so they live
+# until evicted; ratings/comments are a separate, short-lived fragment.
+RECIPE_CACHE_SIZE = int(os.getenv("RECIPE_CACHE_SIZE", "2048"))
+RECIPE_CACHE_TTL = float(os.getenv("RECIPE_CACHE_TTL", "86400"))
+RECIPE_SOCIAL_CACHE_TTL = float(os.getenv("RECIPE_SOCIAL_CACHE_TTL", "60"))
+
+_recipe_doc_cache = TieredCache(LRUCache(RECIPE_CACHE_SIZE, ttl=RECIPE_CACHE_TTL), namespace="recipe_doc")
+_recipe_social_cache = TieredCache(LRUCache(RECIPE_CACHE_SIZE, ttl=RECIPE_SOCIAL_CACHE_TTL), namespace="recipe_social")
+
+
+def configure_recipe_cache(shared: Optional[CacheBackend]) -> None:
+    """
+    Put a shared backend (e.g. InMemoryBackend, Redis) behind the local LRUs.
+    """
+    _recipe_doc_cache.shared = shared
+    _recipe_social_cache.shared = shared
+
+
+def invalidate_recipe(recipe_id: int) -> None:
+    _recipe_doc_cache.delete(recipe_id)
+    _recipe_social_cache.delete(recipe_id)
+
+
+def invalidate_recipe_social(recipe_id: int) -> None:
+    """
+    Call after a rating or comment is written for recipe_id.
+    """
+    _recipe_social_cache.delete(recipe_id)
+
+
+def clear_recipe_cache() -> None:
+    _recipe_doc_cache.clear()
+    _recipe_social_cache.clear()
+
 
 
 def get_full_recipe_by_id(session: Session, recipe_id: int) -> dict:
@@ -165,3 +208,281 @@ def get_full_recipe_by_id(session: Session, recipe_id: int) -> dict:
             "tags": [t for t in tags],
         },
     }
+
+
+def get_recipe_summaries(session: Session, recipe_ids: List[int]) -> List[dict]:
+    """
+    Lightweight recipe rows (name, calories, dish type) in the order of recipe_ids.
+    """
+    if not recipe_ids:
+        return []
+
+    rows = session.exec(
+        select(
+            Recipe.recipe_id,
+            Recipe.recipe_name,
+            Recipe.calories,
+            DishType.dish_type_name,
+        )
+        .outerjoin(DishType, DishType.dish_type_id == Recipe.dish_type_id)
+        .where(Recipe.recipe_id.in_(recipe_ids))
+    ).all()
+    by_id = {row.recipe_id: row for row in rows}
+
+    return [
+        {
+            "recipe_id": by_id[rid].recipe_id,
+            "recipe_name": by_id[rid].recipe_name,
+            "calories": by_id[rid].calories,
+            "dish_type": by_id[rid].dish_type_name,
+        }
+        for rid in recipe_ids
+        if rid in by_id
+    ]
+
+
+def _load_recipe_documents(session: Session, recipe_ids: List[int]) -> Dict[int, dict]:
+    """
+    Static part of the recipe documents (everything but ratings/comments),
+    one IN (...) query per table.
+    """
+    if not recipe_ids:
+        return {}
+
+    # --------------------------------------------------
+    # 1. Recipes + dish types
+    # --------------------------------------------------
+    recipes = session.exec(
+        select(Recipe).where(Recipe.recipe_id.in_(recipe_ids))
+    ).all()
+    recipe_by_id = {r.recipe_id: r for r in recipes}
+
+    dish_type_ids = {r.dish_type_id for r in recipes if r.dish_type_id}
+    dish_type_by_id = {}
+    if dish_type_ids:
+        dish_type_by_id = dict(session.exec(
+            select(DishType.dish_type_id, DishType.dish_type_name)
+            .where(DishType.dish_type_id.in_(dish_type_ids))
+        ).all())
+
+    found_ids = list(recipe_by_id)
+    if not found_ids:
+        return {}
+
+    # --------------------------------------------------
+    # 2. Ingredients
+    # --------------------------------------------------
+    ingredients_by_recipe: Dict[int, list] = {rid: [] for rid in found_ids}
+    for row in session.exec(
+        select(
+            RecipeIngredient.recipe_id,
+            Ingredient.ingredient_id,
+            Ingredient.ingredient_name,
+            Ingredient.measuring_unit,
+            RecipeIngredient.amount,
+            RecipeIngredient.quantity,
+        )
+        .join(
+            RecipeIngredient,
+            RecipeIngredient.ingredient_id == Ingredient.ingredient_id,
+        )
+        .where(RecipeIngredient.recipe_id.in_(found_ids))
+    ).all():
+        ingredients_by_recipe[row.recipe_id].append({
+            "ingredient_id": row.ingredient_id,
+            "ingredient_name": row.ingredient_name,
+            "amount": row.amount,
+            "quantity": row.quantity,
+            "unit": row.measuring_unit,
+        })
+
+    # --------------------------------------------------
+    # 3. Instructions
+    # --------------------------------------------------
+    instructions_by_recipe: Dict[int, list] = {rid: [] for rid in found_ids}
+    for inst in session.exec(
+        select(Instruction)
+        .where(Instruction.recipe_id.in_(found_ids))
+        .order_by(Instruction.recipe_id, Instruction.step_number)
+    ).all():
+        instructions_by_recipe[inst.recipe_id].append({
+            "step": inst.step_number,
+            "text": inst.instruction_text,
+        })
+
+    # --------------------------------------------------
+    # 4. Videos (first one per recipe)
+    # --------------------------------------------------
+    video_by_recipe = {}
+    for row in session.exec(
+        select(RecipeVideo.recipe_id, RecipeVideo.video_url)
+        .where(RecipeVideo.recipe_id.in_(found_ids))
+    ).all():
+        video_by_recipe.setdefault(row.recipe_id, row.video_url)
+
+    # --------------------------------------------------
+    # 5. Meta
+    # --------------------------------------------------
+    prep_time_by_recipe = {}
+    for p in session.exec(
+        select(RecipePrepTime).where(RecipePrepTime.recipe_id.in_(found_ids))
+    ).all():
+        prep_time_by_recipe.setdefault(p.recipe_id, p)
+
+    serving_by_recipe = {}
+    for sv in session.exec(
+        select(RecipeServing).where(RecipeServing.recipe_id.in_(found_ids))
+    ).all():
+        serving_by_recipe.setdefault(sv.recipe_id, sv)
+
+    labels_by_recipe: Dict[int, list] = {rid: [] for rid in found_ids}
+    for row in session.exec(
+        select(RecipeDietaryLabel.recipe_id, RecipeDietaryLabel.dietary_label)
+        .where(RecipeDietaryLabel.recipe_id.in_(found_ids))
+    ).all():
+        labels_by_recipe[row.recipe_id].append(row.dietary_label)
+
+    tags_by_recipe: Dict[int, list] = {rid: [] for rid in found_ids}
+    for row in session.exec(
+        select(RecipeTag.recipe_id, RecipeTag.tag_name)
+        .where(RecipeTag.recipe_id.in_(found_ids))
+    ).all():
+        tags_by_recipe[row.recipe_id].append(row.tag_name)
+
+    # --------------------------------------------------
+    # 6. Documents
+    # --------------------------------------------------
+    docs = {}
+    for recipe_id in found_ids:
+        recipe = recipe_by_id[recipe_id]
+        prep_time = prep_time_by_recipe.get(recipe_id)
+        serving = serving_by_recipe.get(recipe_id)
+
+        docs[recipe_id] = {
+            "recipe": {
+                "recipe_id": recipe.recipe_id,
+                "recipe_name": recipe.recipe_name,
+                "calories": recipe.calories,
+            },
+            "dish_type": dish_type_by_id.get(recipe.dish_type_id),
+            "ingredients": ingredients_by_recipe[recipe_id],
+            "instructions": instructions_by_recipe[recipe_id],
+            "videos": video_by_recipe.get(recipe_id),
+            "meta": {
+                "prep_time": prep_time.dict() if prep_time else None,
+                "servings": serving.dict() if serving else None,
+                "dietary_labels": labels_by_recipe[recipe_id],
+                "tags": tags_by_recipe[recipe_id],
+            },
+        }
+
+    return docs
+
+
+def _load_recipe_social(session: Session, recipe_ids: List[int]) -> Dict[int, dict]:
+    """
+    Ratings and comments of the given recipes (two IN (...) queries).
+    """
+    if not recipe_ids:
+        return {}
+
+    # --------------------------------------------------
+    # 1. Ratings
+    # --------------------------------------------------
+    ratings_by_recipe: Dict[int, list] = {rid: [] for rid in recipe_ids}
+    for r in session.exec(
+        select(
+            UserRating.recipe_id,
+            User.username,
+            UserRating.rating,
+        )
+        .join(User, User.user_id == UserRating.user_id)
+        .where(UserRating.recipe_id.in_(recipe_ids))
+    ).all():
+        ratings_by_recipe[r.recipe_id].append({
+            "username": r.username,
+            "rating": r.rating,
+        })
+
+    # --------------------------------------------------
+    # 2. Comments
+    # --------------------------------------------------
+    comments_by_recipe: Dict[int, list] = {rid: [] for rid in recipe_ids}
+    for c in session.exec(
+        select(
+            RecipeComment.recipe_id,
+            RecipeComment.comment_text,
+            RecipeComment.comment_date,
+            User.username,
+        )
+        .join(User, User.user_id == RecipeComment.user_id)
+        .where(RecipeComment.recipe_id.in_(recipe_ids))
+        .order_by(RecipeComment.comment_date.desc())
+    ).all():
+        comments_by_recipe[c.recipe_id].append({
+            "username": c.username,
+            "comment": c.comment_text,
+            "date": c.comment_date,
+        })
+
+    return {
+        rid: {"ratings": ratings_by_recipe[rid], "comments": comments_by_recipe[rid]}
+        for rid in recipe_ids
+    }
+
+
+def get_full_recipes_by_ids(session: Session, recipe_ids: List[int], use_cache: bool = True) -> List[dict]:
+    """
+    Batched version of get_full_recipe_by_id.
+
+    Recipe documents and their ratings/comments are served from the recipe
+    cache when possible; misses are hydrated with a constant number of
+    IN (...) queries. Returned in the order of recipe_ids (unknown ids are
+    skipped). Treat the returned dicts as read-only.
+    """
+    recipe_ids = list(dict.fromkeys(recipe_ids))
+    if not recipe_ids:
+        return []
+
+    if not use_cache:
+        docs = _load_recipe_documents(session, recipe_ids)
+        social = _load_recipe_social(session, list(docs))
+    else:
+        docs = {}
+        social = {}
+        for rid in recipe_ids:
+            doc = _recipe_doc_cache.get(rid)
+            if doc is not None:
+                docs[rid] = doc
+            fragment = _recipe_social_cache.get(rid)
+            if fragment is not None:
+                social[rid] = fragment
+
+        missing_docs = [rid for rid in recipe_ids if rid not in docs]
+        for rid, doc in _load_recipe_documents(session, missing_docs).items():
+            _recipe_doc_cache.set(rid, doc)
+            docs[rid] = doc
+
+        missing_social = [rid for rid in docs if rid not in social]
+        for rid, fragment in _load_recipe_social(session, missing_social).items():
+            _recipe_social_cache.set(rid, fragment)
+            social[rid] = fragment
+
+    out = []
+    for recipe_id in recipe_ids:
+        doc = docs.get(recipe_id)
+        if doc is None:
+            continue
+
+        out.append({
+            "recipe": doc["recipe"],
+            "dish_type": doc["dish_type"],
+            "ingredients": doc["ingredients"],
+            "instructions": doc["instructions"],
+            "videos": doc["videos"],
+            "ratings": social[recipe_id]["ratings"],
+            "comments": social[recipe_id]["comments"],
+            "meta": doc["meta"],
+        })
+
+    return out
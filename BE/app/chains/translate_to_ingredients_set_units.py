@@ -1,13 +1,24 @@
-from typing import Dict, Any, List, Tuple
+from typing import Dict, Any, List, Tuple, Literal, Optional
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import os
 import re
+import csv
+import unicodedata
 import json
+import hashlib
 
 from sqlmodel import Session
-from langchain_openai import ChatOpenAI
+from sqlmodel.ext.asyncio.session import AsyncSession
+from app.chains.llm_provider import get_chat_model, get_llm_provider
 from dotenv import load_dotenv
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+from langchain_core.output_parsers import PydanticOutputParser
 
 from app.sql.sql_fxns import get_ingredient_table
+from app.chains.ingredient_catalog import IngredientCatalog, get_ingredient_catalog, aget_ingredient_catalog
+from app.chains.ingredient_resolver import normalize_name, name_key, singularize
+from app.core.llm_cache import llm_cache
 
 load_dotenv()
 
@@ -67,19 +78,48 @@ UNIT_NORMALIZATION = {
     "teaspoon": "teaspoon",
     "tsp": "teaspoon",
     "ml": "ml",
+    "milliliters": "ml",
+    "milliliter": "ml",
     "l": "l",
+    "liters": "l",
+    "liter": "l",
+    "litres": "l",
+    "litre": "l",
+    "pints": "pint",
+    "pint": "pint",
+    "pt": "pint",
+    "quarts": "quart",
+    "quart": "quart",
+    "qt": "quart",
+    "gallons": "gallon",
+    "gallon": "gallon",
+    "gal": "gallon",
 
     # mass
     "kilograms": "kg",
     "kilogram": "kg",
+    "kgs": "kg",
     "kg": "kg",
     "grams": "gram",
     "gram": "gram",
     "g": "gram",
+    "milligrams": "mg",
+    "milligram": "mg",
+    "mg": "mg",
+    "ounces": "oz",
+    "ounce": "oz",
+    "oz": "oz",
+    "pounds": "lb",
+    "pound": "lb",
+    "lbs": "lb",
+    "lb": "lb",
 
     # discrete
     "cloves": "clove",
     "clove": "clove",
+    "pinches": "pinch",
+    "pinch": "pinch",
+    "large": "large",
     "pcs": "pcs",
     "piece": "pcs",
     "pieces": "pcs",
@@ -95,23 +135,95 @@ def normalize_unit(unit: str | None) -> str | None:
 # ---------------- Quantity Parsing -----------------------
 # =========================================================
 
-def parse_quantity(text: str) -> Tuple[float | None, str | None]:
+NUMBER_WORDS = {
+    "a": 1, "an": 1, "one": 1, "two": 2, "three": 3, "four": 4,
+    "five": 5, "six": 6, "seven": 7, "eight": 8, "nine": 9, "ten": 10,
+    "eleven": 11, "twelve": 12, "half": 0.5, "couple": 2, "dozen": 12,
+}
+
+UNICODE_FRACTIONS = "½⅓⅔¼¾⅕⅖⅗⅘⅙⅚⅛⅜⅝⅞"
+
+_NUMBER = rf"(?:\d+\s+\d+/\d+|\d+/\d+|\d*\s*[{UNICODE_FRACTIONS}]|\d+(?:\.\d+)?)"
+_WORDS = r"(?:\b(?:" + "|".join(NUMBER_WORDS) + r")\b\s*)+"
+
+QUANTITY_PATTERN = re.compile(
+    rf"""
+    (?:(?P<number>{_NUMBER})\s*(?P<scale>{_WORDS})? | (?P<words>{_WORDS}))
+    (?:\s*(?:-|–|to)\s*(?P<upper>{_NUMBER}))?
+    (?:\s*[x×*]\s*(?P<each>{_NUMBER}))?
+    \s*(?P<unit>[a-z]+)?
+    """,
+    re.VERBOSE,
+)
+
+# Plain '<number> <unit>' is by far the most common input.
+SIMPLE_QUANTITY_PATTERN = re.compile(r"\s*(\d+(?:\.\d+)?)\s*([a-z]+)\s*")
+
+
+def _number_value(token: str) -> float:
+    if token.isdigit():
+        return float(token)
+    token = token.strip()
+    if token[-1] in UNICODE_FRACTIONS:
+        whole = token[:-1].strip()
+        return (float(whole) if whole else 0.0) + unicodedata.numeric(token[-1])
+    if "/" in token:
+        whole, _, fraction = token.rpartition(" ")
+        numerator, denominator = fraction.split("/")
+        return (float(whole) if whole else 0.0) + float(numerator) / float(denominator)
+    return float(token)
+
+
+def _words_value(words: str) -> float:
+    value = 1.0
+    for word in words.split():
+        value *= NUMBER_WORDS[word]
+    return value
+
+
+def _names_item(word: str, item_name: str | None) -> bool:
+    return bool(item_name) and singularize(word) in name_key(item_name).split()
+
+
+def parse_quantity(text: str, item_name: str | None = None) -> Tuple[float | None, str | None]:
     """
     Parses:
-    - '5 kg'
-    - '05 Kg'
-    - '2cups'
-    - '1 tbsp'
+    - '5 kg', '05 Kg', '2cups', '1 tbsp'
+    - '1/2 cup', '1 1/2 cups', '1 ½ tbsp'
+    - '1-2 cups' (lower bound is kept)
+    - '2x500g'
+    - 'a dozen eggs', 'half a dozen'
+    - '3', or '3 eggs' when item_name is 'eggs' (counts -> 'pcs')
+
+    Any other unit word is returned as-is ('2 sprigs' -> 'sprigs') so the
+    conversion step still sees the real unit.
     """
-    pattern = re.compile(r"(\d+(?:\.\d+)?)\s*([a-zA-Z]+)")
-    match = pattern.search(text.lower())
+    text = text.lower()
+
+    match = SIMPLE_QUANTITY_PATTERN.fullmatch(text)
+    if match and match.group(2) in UNIT_NORMALIZATION:
+        return float(match.group(1)), UNIT_NORMALIZATION[match.group(2)]
+
+    match = QUANTITY_PATTERN.search(text)
 
     if not match:
         return None, None
 
-    value = float(match.group(1))
-    unit = normalize_unit(match.group(2))
-    return value, unit
+    number, scale, words, each, unit = match.group("number", "scale", "words", "each", "unit")
+
+    if number:
+        value = _number_value(number)
+        if scale:
+            value *= _words_value(scale)
+    else:
+        value = _words_value(words)
+
+    if each:
+        value *= _number_value(each)
+
+    if unit is None or _names_item(unit, item_name):
+        unit = "pcs"
+    return value, normalize_unit(unit)
 
 
 # =========================================================
@@ -122,6 +234,8 @@ EASY_CONVERSION = {
     ("kg", "gram"): 1000,
     ("gram", "kg"): 0.001,
 
+    ("l", "ml"): 1000,
+
     ("cup", "tablespoon"): 16,
     ("tablespoon", "teaspoon"): 3,
 
@@ -129,10 +243,95 @@ EASY_CONVERSION = {
     ("tablespoon", "gram"): 15,
     ("cup", "gram"): 240,
     ("ml", "gram"): 1,
+
+    ("gram", "mg"): 1000,
+    ("lb", "oz"): 16,
+    ("oz", "gram"): 28.3495,
+
+    # US liquid measures
+    ("gallon", "ml"): 3785.41,
+    ("quart", "ml"): 946.353,
+    ("pint", "ml"): 473.176,
 }
 
-def convert_amount(value: float, from_unit: str, to_unit: str) -> float | None:
-    factor = EASY_CONVERSION.get((from_unit, to_unit))
+MASS_UNITS = {"gram", "kg", "mg", "oz", "lb"}
+VOLUME_UNITS = {"ml", "l", "cup", "tablespoon", "teaspoon", "pint", "quart", "gallon"}
+
+
+def compile_conversions(direct: Dict[Tuple[str, str], float]) -> Dict[Tuple[str, str], float]:
+    """
+    Treat the direct conversions as a graph (plus their inverses) and
+    precompute the factor between every pair of connected units.
+    Shortest paths win, so listed pairs are used as-is.
+    Mass <-> volume edges above assume the density of water.
+    """
+    graph: Dict[str, Dict[str, float]] = {}
+    for (a, b), factor in direct.items():
+        graph.setdefault(a, {})[b] = factor
+        graph.setdefault(b, {}).setdefault(a, 1 / factor)
+
+    factors = {}
+    for start in graph:
+        reached = {start: 1.0}
+        frontier = [start]
+        while frontier:
+            next_frontier = []
+            for unit in frontier:
+                for neighbour, factor in graph[unit].items():
+                    if neighbour not in reached:
+                        reached[neighbour] = reached[unit] * factor
+                        next_frontier.append(neighbour)
+            frontier = next_frontier
+        for unit, factor in reached.items():
+            if unit != start:
+                factors[(start, unit)] = factor
+    return factors
+
+
+CONVERSION_FACTORS = compile_conversions(EASY_CONVERSION)
+
+
+def load_ingredient_densities(path: str) -> Dict[str, float]:
+    """
+    ingredient_name,grams_per_ml CSV -> {normalized name: density}
+    """
+    densities = {}
+    try:
+        with open(path, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                densities[normalize_name(row["ingredient_name"])] = float(row["grams_per_ml"])
+    except (OSError, KeyError, ValueError) as e:
+        print(f"[WARN] Could not load ingredient densities from {path}: {e}")
+    return densities
+
+
+INGREDIENT_DENSITIES = load_ingredient_densities(os.getenv(
+    "INGREDIENT_DENSITIES_PATH",
+    os.path.join(os.path.dirname(__file__), "..", "data", "ingredient_densities.csv"),
+))
+
+
+def _factor(from_unit: str, to_unit: str) -> float | None:
+    if from_unit == to_unit:
+        return 1.0
+    return CONVERSION_FACTORS.get((from_unit, to_unit))
+
+
+def convert_amount(value: float, from_unit: str, to_unit: str, ingredient_name: str | None = None) -> float | None:
+    """
+    Dict lookup in the precompiled conversion table. Mass <-> volume
+    conversions use the ingredient's density when one is known.
+    Returns None when the units are not connected.
+    """
+    density = INGREDIENT_DENSITIES.get(normalize_name(ingredient_name)) if ingredient_name else None
+
+    if density:
+        if from_unit in VOLUME_UNITS and to_unit in MASS_UNITS:
+            return value * _factor(from_unit, "ml") * density * _factor("gram", to_unit)
+        if from_unit in MASS_UNITS and to_unit in VOLUME_UNITS:
+            return value * _factor(from_unit, "gram") / density * _factor("ml", to_unit)
+
+    factor = _factor(from_unit, to_unit)
     if factor is None:
         return None
     return value * factor
@@ -142,7 +341,14 @@ def convert_amount(value: float, from_unit: str, to_unit: str) -> float | None:
 # -------------------- LLM Setup --------------------------
 # =========================================================
 
-llm = ChatOpenAI(model="gpt-3.5-turbo-16k", temperature=0)
+LLM_MODEL = "gpt-3.5-turbo-16k"
+
+llm = get_chat_model(LLM_MODEL, temperature=0)
+
+# cache key component: answers from different providers must not mix
+LLM_CACHE_MODEL = f"{get_llm_provider()}:{LLM_MODEL}"
+
+# Every LLM helper below is memoized through llm_cache; failures are never cached.
 
 
 # =========================================================
@@ -161,9 +367,12 @@ Text:
 
 Return ONLY one word.
 """
-    try:
+    def call():
         out = llm.invoke(prompt).content.strip().upper()
         return out if out in {"INGREDIENT", "DISH"} else "INGREDIENT"
+
+    try:
+        return llm_cache.cached("classify_food", normalize_name(text), call, model=LLM_CACHE_MODEL)
     except Exception:
         return "INGREDIENT"
 
@@ -172,7 +381,8 @@ Return ONLY one word.
 # ------------ Ingredient Name Resolution ----------------
 # =========================================================
 
-def resolve_ingredient_llm(raw_name: str, ingredient_list: List[str]) -> dict:
+def resolve_ingredient_llm(raw_name: str, ingredient_list: List[str], ingredient_list_json: str | None = None,
+                           catalog_version: str | None = None) -> dict:
     """
     Resolve noisy ingredient names to exact DB ingredient names.
 
@@ -180,7 +390,15 @@ def resolve_ingredient_llm(raw_name: str, ingredient_list: List[str]) -> dict:
     - Output MUST be from allowed list
     - If one name contains another, ALWAYS choose the LONGER one
       (e.g. honeydew → Honeydew, NOT Honey)
+
+    ingredient_list_json may be passed pre-serialized and catalog_version
+    precomputed (IngredientCatalog); otherwise both are derived here.
     """
+    if ingredient_list_json is None:
+        ingredient_list_json = json.dumps(ingredient_list)
+    if catalog_version is None:
+        catalog_version = hashlib.sha1(ingredient_list_json.encode("utf-8")).hexdigest()[:12]
+
     prompt = f"""
 You are an ingredient normalizer.
 
@@ -188,7 +406,7 @@ Raw ingredient:
 "{raw_name}"
 
 Allowed ingredient list (sorted by specificity):
-{json.dumps(ingredient_list)}
+{ingredient_list_json}
 
 Return EXACTLY this JSON:
 {{
@@ -206,7 +424,13 @@ Rules:
 - No explanations
 """
     try:
-        return json.loads(llm.invoke(prompt).content)
+        return llm_cache.cached(
+            "resolve_ingredient",
+            normalize_name(raw_name),
+            lambda: json.loads(llm.invoke(prompt).content),
+            catalog_version=catalog_version,
+            model=LLM_CACHE_MODEL,
+        )
     except Exception:
         return {"status": "UNKNOWN", "ingredient_name": None, "candidates": []}
 
@@ -224,6 +448,33 @@ def llm_convert_with_guardrails(
     """
     LLM-based conversion with HARD safety bounds.
     Used only when deterministic conversion fails.
+
+    Conversions are linear, so the guarded per-unit factor is cached per
+    (ingredient, from_unit, to_unit) and reused for any amount.
+    """
+    if amount == 0:
+        return amount
+
+    def call():
+        return _llm_convert_factor(ingredient_name, amount, from_unit, to_unit)
+
+    try:
+        factor = llm_cache.cached(
+            "convert_factor",
+            [normalize_name(ingredient_name), from_unit, to_unit],
+            call,
+            model=LLM_CACHE_MODEL,
+        )
+    except Exception:
+        return amount
+
+    return amount * factor
+
+
+def _llm_convert_factor(ingredient_name: str, amount: float, from_unit: str, to_unit: str) -> float:
+    """
+    Ask the LLM to convert amount and return the guarded factor (result / amount).
+    Raises if the model does not answer with a number.
     """
     prompt = f"""
 You are estimating ingredient quantities for a cooking inventory app.
@@ -240,89 +491,277 @@ Rules:
 - Return ONLY a number
 - Round to 2 decimals
 """
-    try:
-        estimated = float(llm.invoke(prompt).content.strip())
-    except Exception:
-        return amount
-
-    # -------- Guardrails --------
-    if estimated <= 0:
-        return amount
-
-    if estimated > amount * 10_000:
-        return amount * 1000
-
-    if estimated < amount * 0.0001:
-        return amount * 0.01
+    estimated = float(llm.invoke(prompt).content.strip())
 
     print(
         f"[LLM-GUESS] {ingredient_name}: "
         f"{amount} {from_unit} → {estimated} {to_unit}"
     )
 
-    return estimated
+    return guard_conversion_factor(estimated / amount)
+
+
+def guard_conversion_factor(factor: float) -> float:
+    """
+    HARD safety bounds on an LLM-estimated conversion factor.
+    """
+    if factor <= 0:
+        return 1.0
+
+    if factor > 10_000:
+        return 1000.0
+
+    if factor < 0.0001:
+        return 0.01
+
+    return factor
+
+
+# =========================================================
+# ----------- Batched Classify + Resolve + Convert --------
+# =========================================================
+
+class BatchItemResult(BaseModel):
+    index: int = Field(..., description="index of the item in the input list")
+    classification: Literal["INGREDIENT", "DISH"]
+    status: Literal["RESOLVED", "AMBIGUOUS", "UNKNOWN"]
+    ingredient_name: Optional[str] = Field(None, description="exact name from the allowed list, or null")
+    conversion_factor: Optional[float] = Field(
+        None, description="multiply the item quantity by this to get the amount in the ingredient's unit"
+    )
+
+
+class BatchVerifyOutput(BaseModel):
+    items: List[BatchItemResult]
+
+
+batch_parser = PydanticOutputParser(pydantic_object=BatchVerifyOutput)
+
+
+def batch_verify_llm(items: List[Dict[str, Any]], catalog: IngredientCatalog) -> Dict[int, BatchItemResult]:
+    """
+    One LLM call doing classify_food_llm + resolve_ingredient_llm +
+    llm_convert_with_guardrails for all items at once, with the allowed
+    ingredient list (and units) in the prompt only once.
+
+    items: [{"index", "raw_name", "amount", "unit"}]
+    Returns results by index; raises if the reply does not match the schema.
+    """
+    allowed = json.dumps({name: catalog.unit_map[catalog.ingredient_map[name.lower()]] for name in catalog.ingredient_list})
+
+    prompt = f"""
+You are an ingredient normalizer for a cooking inventory app.
+
+Allowed ingredients with their storage unit (sorted by specificity):
+{allowed}
+
+Items:
+{json.dumps(items)}
+
+For EVERY item:
+1. classification: INGREDIENT (raw food item) or DISH (prepared meal or recipe)
+2. status / ingredient_name: resolve the raw name to an allowed ingredient
+   - ingredient_name MUST be from the allowed list, or null
+   - If one ingredient name is a substring of another, ALWAYS choose the LONGER name
+   - Prefer exact matches over semantic ones
+   - Do NOT collapse ingredients into more generic ones
+3. conversion_factor: number to multiply the item amount (in its unit) by to get the
+   amount in the resolved ingredient's storage unit; null if the units are the same.
+   Make a reasonable culinary assumption; approximation is acceptable.
+
+{batch_parser.get_format_instructions()}
+
+No explanations.
+"""
+    out = batch_parser.parse(llm.invoke(prompt).content)
+    return {item.index: item for item in out.items}
+
+
+def _verify_batched(catalog: IngredientCatalog, user_input: Dict[str, str]) -> List[Dict[str, Any]]:
+    """
+    Resolve what we can locally, then send every remaining item in a single
+    LLM request. Falls back to the per-item path if the batch call fails.
+    """
+    items = list(user_input.items())
+    rows: List[Dict[str, Any] | None] = [None] * len(items)
+    pending = []
+
+    for index, (raw_name, raw_qty) in enumerate(items):
+        qty_value, qty_unit = parse_quantity(raw_qty, raw_name)
+        if qty_value is None or qty_unit is None:
+            continue
+
+        resolved = catalog.resolver.resolve(raw_name)
+        if resolved["status"] == "RESOLVED":
+            ingredient_id = catalog.ingredient_map[resolved["ingredient_name"].lower()]
+            db_unit = normalize_unit(catalog.unit_map[ingredient_id])
+            if qty_unit == db_unit or convert_amount(qty_value, qty_unit, db_unit, resolved["ingredient_name"]) is not None:
+                rows[index] = _to_row(catalog, resolved["ingredient_name"], raw_qty, raw_name=raw_name)
+                continue
+
+        pending.append({"index": index, "raw_name": raw_name, "amount": qty_value, "unit": qty_unit})
+
+    if pending:
+        try:
+            results = batch_verify_llm(pending, catalog)
+        except Exception as e:
+            print(f"[WARN] Batched verification failed, verifying items one by one: {e}")
+            results = None
+
+        for item in pending:
+            index = item["index"]
+            raw_name, raw_qty = items[index]
+
+            if results is None:
+                rows[index] = _verify_item(catalog, raw_name, raw_qty)
+                continue
+
+            result = results.get(index)
+            if result is None:
+                # the model skipped it: per-item path
+                rows[index] = _verify_item(catalog, raw_name, raw_qty)
+                continue
+
+            if result.classification == "DISH" or result.status != "RESOLVED" or not result.ingredient_name:
+                continue
+
+            rows[index] = _to_row(catalog, result.ingredient_name, raw_qty, result.conversion_factor, raw_name)
+
+    return [row for row in rows if row is not None]
 
 
 # =========================================================
 # ------------------ MAIN PIPELINE ------------------------
 # =========================================================
 
-def verifying_ingredients_chain(
-    session: Session,
-    user_input: Dict[str, str]
-) -> List[Dict[str, Any]]:
+# Max ingredients verified at once, shared by all requests in the process
+VERIFY_CONCURRENCY = int(os.getenv("VERIFY_CONCURRENCY", "8"))
+
+# "per_item" (concurrent per-item LLM calls) or "batched" (one LLM call per request)
+VERIFY_MODE = os.getenv("VERIFY_MODE", "per_item").lower()
+
 
-    rows = []
-    ingredient_list, ingredient_map, unit_map = load_ingredients_from_db(session)
+def _use_batched(batched: bool | None) -> bool:
+    return batched if batched is not None else VERIFY_MODE == "batched"
 
-    for raw_name, raw_qty in user_input.items():
+_verify_executor = ThreadPoolExecutor(max_workers=VERIFY_CONCURRENCY, thread_name_prefix="verify")
+
+
+def _verify_item(catalog: IngredientCatalog, raw_name: str, raw_qty: str) -> Dict[str, Any] | None:
+    """
+    Run one user item through resolution, parsing and conversion.
+    Returns None when the item is dropped. Never touches the DB session,
+    so it is safe to run in a worker thread.
+    """
+    # 0. Local resolution (a confident catalog match is an ingredient, not a dish)
+    resolved = catalog.resolver.resolve(raw_name)
 
-        # 0. Dish filter
+    if resolved["status"] != "RESOLVED":
+        # 1. Dish filter
         if classify_food_llm(raw_name) == "DISH":
-            continue
+            return None
 
-        # 1. Resolve ingredient name
-        resolved = resolve_ingredient_llm(raw_name, ingredient_list)
+        # 2. Resolve ingredient name
+        resolved = resolve_ingredient_llm(raw_name, catalog.ingredient_list, catalog.ingredient_list_json, catalog.version)
         if resolved["status"] != "RESOLVED":
-            continue
+            return None
 
-        ingredient_name = resolved["ingredient_name"].lower().strip()
-        ingredient_id = ingredient_map.get(ingredient_name)
+    return _to_row(catalog, resolved["ingredient_name"], raw_qty, raw_name=raw_name)
 
-        if ingredient_id is None:
-            print(f"[WARN] Ingredient not in DB: {ingredient_name}")
-            continue
 
-        db_unit = normalize_unit(unit_map[ingredient_id])
+def _to_row(catalog: IngredientCatalog, ingredient_name: str, raw_qty: str,
+            conversion_factor: float | None = None, raw_name: str | None = None) -> Dict[str, Any] | None:
+    """
+    Parse and convert raw_qty into the DB unit of an already resolved ingredient.
+    conversion_factor (from the batched LLM call) is used only when no
+    deterministic conversion exists. raw_name (what the user typed) lets
+    '3 eggs' count as pieces.
+    """
+    ingredient_name = ingredient_name.lower().strip()
+    ingredient_id = catalog.ingredient_map.get(ingredient_name)
 
-        # 2. Parse quantity
-        qty_value, qty_unit = parse_quantity(raw_qty)
-        if qty_value is None or qty_unit is None:
-            continue
+    if ingredient_id is None:
+        print(f"[WARN] Ingredient not in DB: {ingredient_name}")
+        return None
+
+    db_unit = normalize_unit(catalog.unit_map[ingredient_id])
 
-        # 3. Convert quantity
-        if qty_unit == db_unit:
-            final_amount = qty_value
+    # 3. Parse quantity
+    qty_value, qty_unit = parse_quantity(raw_qty, raw_name or ingredient_name)
+    if qty_value is None or qty_unit is None:
+        return None
+
+    # 4. Convert quantity
+    if qty_unit == db_unit:
+        final_amount = qty_value
+    else:
+        converted = convert_amount(qty_value, qty_unit, db_unit, ingredient_name)
+        if converted is not None:
+            final_amount = converted
+        elif conversion_factor is not None:
+            final_amount = qty_value * guard_conversion_factor(conversion_factor)
         else:
-            converted = convert_amount(qty_value, qty_unit, db_unit)
-            if converted is not None:
-                final_amount = converted
-            else:
-                final_amount = llm_convert_with_guardrails(
-                    ingredient_name,
-                    qty_value,
-                    qty_unit,
-                    db_unit
-                )
-
-        # 4. Store result (never silently drop)
-        rows.append({
-            "ingredient_id": ingredient_id,
-            "amount": round(final_amount, 2),
-            "unit": db_unit
-        })
-
-    return rows
+            final_amount = llm_convert_with_guardrails(
+                ingredient_name,
+                qty_value,
+                qty_unit,
+                db_unit
+            )
+
+    # 5. Store result (never silently drop)
+    return {
+        "ingredient_id": ingredient_id,
+        "amount": round(final_amount, 2),
+        "unit": db_unit
+    }
+
+
+def verifying_ingredients_chain(
+    session: Session,
+    user_input: Dict[str, str],
+    batched: bool | None = None
+) -> List[Dict[str, Any]]:
+    """
+    Verify all items concurrently on the shared worker pool, or with a single
+    batched LLM call (batched=True / VERIFY_MODE=batched).
+    Output keeps the order of user_input.
+    """
+    catalog = get_ingredient_catalog(session)
+
+    if _use_batched(batched):
+        return _verify_batched(catalog, user_input)
+
+    results = _verify_executor.map(
+        lambda item: _verify_item(catalog, item[0], item[1]),
+        list(user_input.items())
+    )
+    return [row for row in results if row is not None]
+
+
+async def averifying_ingredients_chain(
+    session: Session | AsyncSession,
+    user_input: Dict[str, str],
+    batched: bool | None = None
+) -> List[Dict[str, Any]]:
+    """
+    Async variant for FastAPI routes: the LLM round trips (per item, or the
+    single batched call) run on the shared worker pool so the event loop is
+    never blocked. Output keeps the order of user_input.
+    """
+    if isinstance(session, AsyncSession):
+        catalog = await aget_ingredient_catalog(session)
+    else:
+        catalog = get_ingredient_catalog(session)
+    loop = asyncio.get_running_loop()
+
+    if _use_batched(batched):
+        return await loop.run_in_executor(_verify_executor, _verify_batched, catalog, user_input)
+
+    results = await asyncio.gather(*[
+        loop.run_in_executor(_verify_executor, _verify_item, catalog, raw_name, raw_qty)
+        for raw_name, raw_qty in user_input.items()
+    ])
+    return [row for row in results if row is not None]
 
 
 # =========================================================
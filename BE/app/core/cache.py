@@ -0,0 +1,171 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+
+# =========================================================
+# ------------------- Backend Interface -------------------
+# =========================================================
+
+class CacheBackend:
+    """
+    Minimal key/value cache interface.
+    A shared backend (e.g. Redis) only needs to implement these methods.
+    """
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        raise NotImplementedError
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        raise NotImplementedError
+
+    def delete(self, key: Hashable) -> None:
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        raise NotImplementedError
+
+
+# =========================================================
+# ------------------ In-process LRU -----------------------
+# =========================================================
+
+class LRUCache(CacheBackend):
+    """
+    Thread-safe, size-bounded LRU with optional per-entry expiry.
+    maxsize <= 0 disables the cache.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: Optional[float] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[key]
+                self.misses += 1
+                return None
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        if self.maxsize <= 0:
+            return
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> dict:
+        return {"size": len(self._data), "maxsize": self.maxsize, "hits": self.hits, "misses": self.misses}
+
+
+# =========================================================
+# ------------- Shared Backend Stand-in -------------------
+# =========================================================
+
+class InMemoryBackend(CacheBackend):
+    """
+    Unbounded dict with expiry, standing in for a shared cache server
+    (tests, single-process deployments).
+    """
+
+    def __init__(self):
+        self._data: dict = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[key]
+                return None
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        expires_at = time.monotonic() + ttl if ttl is not None else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+# =========================================================
+# ------------------- Two-tier Cache ----------------------
+# =========================================================
+
+class TieredCache(CacheBackend):
+    """
+    Local LRU in front of an optional shared backend.
+    Shared hits are copied into the local tier.
+    """
+
+    def __init__(self, local: LRUCache, shared: Optional[CacheBackend] = None, namespace: str = ""):
+        self.local = local
+        self.shared = shared
+        self.namespace = namespace
+
+    def _shared_key(self, key: Hashable) -> str:
+        return f"{self.namespace}:{key}"
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        value = self.local.get(key)
+        if value is not None or self.shared is None:
+            return value
+
+        value = self.shared.get(self._shared_key(key))
+        if value is not None:
+            self.local.set(key, value)
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        self.local.set(key, value, ttl)
+        if self.shared is not None:
+            self.shared.set(self._shared_key(key), value, self.local.ttl if ttl is None else ttl)
+
+    def delete(self, key: Hashable) -> None:
+        self.local.delete(key)
+        if self.shared is not None:
+            self.shared.delete(self._shared_key(key))
+
+    def clear(self) -> None:
+        # only the local tier: the shared backend may hold other namespaces
+        self.local.clear()
@@ -0,0 +1,199 @@
+import asyncio
+import os
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+JOB_MAX_QUEUED = int(os.getenv("JOB_MAX_QUEUED", "1000"))
+# Finished jobs are kept this long for polling
+JOB_RESULT_TTL = float(os.getenv("JOB_RESULT_TTL", "3600"))
+
+
+class JobQueueFull(Exception):
+    pass
+
+
+class Job:
+    """
+    One unit of background work. payload and result must stay
+    JSON-serializable so an external broker can carry them.
+    payload is dropped once the job finishes.
+    """
+
+    def __init__(self, kind: str, user_id: int, payload: Dict[str, Any]):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.user_id = user_id
+        self.payload: Optional[Dict[str, Any]] = payload
+        self.status = "queued"
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+
+    def to_dict(self) -> dict:
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+# =========================================================
+# ------------------- Broker Interface --------------------
+# =========================================================
+
+class JobBroker:
+    """
+    Queue + job store. An external broker (Redis, SQS, ...) only needs to
+    implement these methods.
+    """
+
+    async def enqueue(self, job: Job) -> None:
+        raise NotImplementedError
+
+    async def dequeue(self) -> Job:
+        raise NotImplementedError
+
+    async def save(self, job: Job) -> None:
+        raise NotImplementedError
+
+    async def get(self, job_id: str) -> Optional[Job]:
+        raise NotImplementedError
+
+
+class InMemoryJobBroker(JobBroker):
+    """
+    Process-local stand-in: an asyncio queue plus a dict of jobs.
+    Jobs are lost on restart and only visible to this process.
+    """
+
+    def __init__(self, maxsize: int = JOB_MAX_QUEUED, result_ttl: float = JOB_RESULT_TTL):
+        self.result_ttl = result_ttl
+        self._queue: Optional[asyncio.Queue] = None
+        self._maxsize = maxsize
+        self._jobs: Dict[str, Job] = {}
+
+    @property
+    def queue(self) -> asyncio.Queue:
+        # Created lazily so it binds to the running loop
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self._maxsize)
+        return self._queue
+
+    async def enqueue(self, job: Job) -> None:
+        try:
+            self.queue.put_nowait(job)
+        except asyncio.QueueFull:
+            raise JobQueueFull(f"More than {self._maxsize} jobs queued")
+        self._jobs[job.id] = job
+
+    async def dequeue(self) -> Job:
+        return await self.queue.get()
+
+    async def save(self, job: Job) -> None:
+        self._jobs[job.id] = job
+        self._purge()
+
+    async def get(self, job_id: str) -> Optional[Job]:
+        return self._jobs.get(job_id)
+
+    def _purge(self) -> None:
+        cutoff = time.time() - self.result_ttl
+        expired = [
+            job_id for job_id, job in self._jobs.items()
+            if job.finished_at is not None and job.finished_at < cutoff
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+
+# =========================================================
+# ------------------- Handlers / Workers ------------------
+# =========================================================
+
+JobHandler = Callable[[int, Dict[str, Any]], Awaitable[Any]]
+
+_handlers: Dict[str, JobHandler] = {}
+_broker: JobBroker = InMemoryJobBroker()
+_workers: List[asyncio.Task] = []
+
+
+def job_handler(kind: str):
+    """
+    Register `async def fn(user_id, payload) -> result` for a job kind.
+    Handlers open their own DB sessions; the request's session is gone.
+    """
+    def register(fn: JobHandler) -> JobHandler:
+        _handlers[kind] = fn
+        return fn
+    return register
+
+
+def configure_job_broker(broker: JobBroker) -> None:
+    global _broker
+    _broker = broker
+
+
+async def submit_job(kind: str, user_id: int, payload: Dict[str, Any]) -> Job:
+    if kind not in _handlers:
+        raise ValueError(f"No handler registered for job kind '{kind}'")
+    job = Job(kind, user_id, payload)
+    await _broker.enqueue(job)
+    return job
+
+
+async def get_job(job_id: str) -> Optional[Job]:
+    return await _broker.get(job_id)
+
+
+async def _run(job: Job) -> None:
+    job.status = "running"
+    job.started_at = time.time()
+    await _broker.save(job)
+
+    try:
+        job.result = await _handlers[job.kind](job.user_id, job.payload)
+        job.status = "succeeded"
+    except asyncio.CancelledError:
+        job.status = "failed"
+        job.error = "cancelled"
+        raise
+    except Exception as e:
+        job.status = "failed"
+        job.error = str(getattr(e, "detail", e))
+        print(f"[WARN] Job {job.id} ({job.kind}) failed: {job.error}")
+    finally:
+        job.finished_at = time.time()
+        # payloads can be large (base64 images); only the result is kept for polling
+        job.payload = None
+        await _broker.save(job)
+
+
+async def _worker() -> None:
+    while True:
+        job = await _broker.dequeue()
+        await _run(job)
+
+
+def start_job_workers(count: int = JOB_WORKERS) -> None:
+    """
+    Start `count` asyncio workers on the running loop (call from lifespan).
+    """
+    for _ in range(count - len(_workers)):
+        _workers.append(asyncio.create_task(_worker()))
+
+
+async def stop_job_workers() -> None:
+    for task in _workers:
+        task.cancel()
+    await asyncio.gather(*_workers, return_exceptions=True)
+    _workers.clear()
@@ -0,0 +1,162 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Optional
+
+from app.core.cache import LRUCache
+
+LLM_CACHE_SIZE = int(os.getenv("LLM_CACHE_SIZE", "10000"))
+# SQLite file for the persistent tier ("" disables it)
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", "llm_cache.sqlite3")
+LLM_CACHE_MAX_ROWS = int(os.getenv("LLM_CACHE_MAX_ROWS", "200000"))
+
+_MISSING = object()
+
+
+# =========================================================
+# ------------------- LLM Result Cache --------------------
+# =========================================================
+
+class LLMCache:
+    """
+    Memoization for LLM calls, keyed by (function, normalized input,
+    catalog version, model).
+
+    Two tiers: an in-process LRU and an optional SQLite table that survives
+    restarts and is shared by workers on the same host. Values must be JSON
+    serializable. The persistent tier is trimmed to max_rows by last use.
+    """
+
+    def __init__(self, maxsize: int = LLM_CACHE_SIZE, path: str = LLM_CACHE_PATH, max_rows: int = LLM_CACHE_MAX_ROWS):
+        self.memory = LRUCache(maxsize)
+        self.path = path
+        self.max_rows = max_rows
+        self.memory_hits = 0
+        self.persistent_hits = 0
+        self.misses = 0
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._writes = 0
+
+    # ---------------- keys ----------------
+
+    @staticmethod
+    def make_key(function: str, payload: Any, catalog_version: str = "", model: str = "") -> str:
+        raw = json.dumps([function, payload, catalog_version, model], sort_keys=True, default=str)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    # ------------- persistent tier -------------
+
+    def _db(self) -> Optional[sqlite3.Connection]:
+        if not self.path:
+            return None
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, check_same_thread=False, timeout=5)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, created_at REAL NOT NULL, last_used REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS llm_cache_last_used ON llm_cache(last_used)")
+            conn.commit()
+            self._conn = conn
+        return self._conn
+
+    def _persistent_get(self, key: str) -> Any:
+        with self._lock:
+            try:
+                conn = self._db()
+                if conn is None:
+                    return _MISSING
+                row = conn.execute("SELECT value FROM llm_cache WHERE key = ?", (key,)).fetchone()
+                if row is None:
+                    return _MISSING
+                conn.execute("UPDATE llm_cache SET last_used = ? WHERE key = ?", (time.time(), key))
+                conn.commit()
+                return json.loads(row[0])
+            except sqlite3.Error as e:
+                print(f"[WARN] LLM cache read failed: {e}")
+                return _MISSING
+
+    def _persistent_set(self, key: str, value: Any) -> None:
+        with self._lock:
+            try:
+                conn = self._db()
+                if conn is None:
+                    return
+                now = time.time()
+                conn.execute(
+                    "INSERT OR REPLACE INTO llm_cache (key, value, created_at, last_used) VALUES (?, ?, ?, ?)",
+                    (key, json.dumps(value), now, now),
+                )
+                self._writes += 1
+                if self._writes % 1000 == 0:
+                    self._evict(conn)
+                conn.commit()
+            except sqlite3.Error as e:
+                print(f"[WARN] LLM cache write failed: {e}")
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        (count,) = conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()
+        if count > self.max_rows:
+            conn.execute(
+                "DELETE FROM llm_cache WHERE key IN (SELECT key FROM llm_cache ORDER BY last_used LIMIT ?)",
+                (count - self.max_rows,),
+            )
+
+    # ---------------- public ----------------
+
+    def get(self, key: str) -> Any:
+        value = self.memory.get(key)
+        if value is not None:
+            self.memory_hits += 1
+            return value
+
+        value = self._persistent_get(key)
+        if value is not _MISSING:
+            self.persistent_hits += 1
+            self.memory.set(key, value)
+            return value
+
+        self.misses += 1
+        return _MISSING
+
+    def set(self, key: str, value: Any) -> None:
+        self.memory.set(key, value)
+        self._persistent_set(key, value)
+
+    def cached(self, function: str, payload: Any, compute: Callable[[], Any], catalog_version: str = "", model: str = "") -> Any:
+        """
+        Return the cached result for this call, or compute and store it.
+        Exceptions from compute propagate and nothing is stored.
+        """
+        key = self.make_key(function, payload, catalog_version, model)
+        value = self.get(key)
+        if value is not _MISSING:
+            return value
+
+        value = compute()
+        self.set(key, value)
+        return value
+
+    def clear(self) -> None:
+        self.memory.clear()
+        with self._lock:
+            conn = self._db()
+            if conn is not None:
+                conn.execute("DELETE FROM llm_cache")
+                conn.commit()
+
+    def stats(self) -> dict:
+        return {
+            "memory_hits": self.memory_hits,
+            "persistent_hits": self.persistent_hits,
+            "misses": self.misses,
+            "memory_size": len(self.memory),
+        }
+
+
+llm_cache = LLMCache()
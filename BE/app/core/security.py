@@ -1,9 +1,27 @@
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from fastapi import Request, HTTPException, Depends
 from datetime import datetime, timedelta, timezone
 from jose import jwt, JWTError
 from passlib.context import CryptContext
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from app.core.cache import LRUCache
+
+# bcrypt cost; hashes with any other cost are transparently rehashed on login
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+# Max concurrent bcrypt operations (each one burns a CPU core for ~100-300 ms)
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", "4"))
+
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=BCRYPT_ROUNDS,
+    bcrypt__min_rounds=BCRYPT_ROUNDS,
+    bcrypt__max_rounds=BCRYPT_ROUNDS,
+)
 
 SECRET_KEY = "CHANGE_ME_LONG_RANDOM_SECRET"
 ALGORITHM = "HS256"
@@ -16,6 +34,72 @@ def hash_password(password: str) -> str:
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
+
+# =========================================================
+# ------------- Off-loop Password Hashing -----------------
+# =========================================================
+
+_password_executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="bcrypt")
+
+
+class PasswordPoolStats:
+    """
+    Queue time = time a hashing job waits for a free worker.
+    """
+
+    def __init__(self):
+        self.jobs = 0
+        self.in_flight = 0
+        self.total_queue_ms = 0.0
+        self.max_queue_ms = 0.0
+        self._lock = threading.Lock()
+
+    def snapshot(self) -> dict:
+        return {
+            "workers": PASSWORD_HASH_WORKERS,
+            "bcrypt_rounds": BCRYPT_ROUNDS,
+            "jobs": self.jobs,
+            "in_flight": self.in_flight,
+            "avg_queue_ms": round(self.total_queue_ms / self.jobs, 3) if self.jobs else 0.0,
+            "max_queue_ms": round(self.max_queue_ms, 3),
+        }
+
+
+password_pool_stats = PasswordPoolStats()
+
+
+async def _run_in_password_pool(fn, *args):
+    submitted = time.perf_counter()
+    stats = password_pool_stats
+
+    def job():
+        queued_ms = (time.perf_counter() - submitted) * 1000
+        with stats._lock:
+            stats.jobs += 1
+            stats.total_queue_ms += queued_ms
+            stats.max_queue_ms = max(stats.max_queue_ms, queued_ms)
+        return fn(*args)
+
+    with stats._lock:
+        stats.in_flight += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_password_executor, job)
+    finally:
+        with stats._lock:
+            stats.in_flight -= 1
+
+
+async def ahash_password(password: str) -> str:
+    return await _run_in_password_pool(hash_password, password)
+
+
+async def averify_and_update_password(plain_password: str, hashed_password: str) -> tuple[bool, str | None]:
+    """
+    Verify off the event loop. The second value is a fresh hash when the
+    stored one was made with a different bcrypt cost (save it), else None.
+    """
+    return await _run_in_password_pool(pwd_context.verify_and_update, plain_password, hashed_password)
+
 def create_token(payload: dict, expires_delta: timedelta) -> str:
     to_encode = payload.copy()
     expire = datetime.now(timezone.utc) + expires_delta
@@ -28,17 +112,35 @@ def create_access_token(user_id: int) -> str:
 def create_refresh_token(user_id: int) -> str:
     return create_token({"sub": str(user_id), "type": "refresh"}, timedelta(days=REFRESH_EXPIRE_DAYS))
 
+# Recently verified access tokens -> (user_id, exp); TOKEN_CACHE_SIZE=0 disables it
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "4096"))
+
+_token_cache = LRUCache(TOKEN_CACHE_SIZE)
+
 def get_current_user(request: Request):
     token = request.cookies.get("access_token")
     if not token:
         raise HTTPException(status_code=401, detail="Not authenticated")
 
+    # Entries expire with the token; exp is re-checked against the wall clock
+    cached = _token_cache.get(token)
+    if cached is not None:
+        user_id, exp = cached
+        if exp > time.time():
+            return user_id
+        _token_cache.delete(token)
+
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         if payload.get("type") != "access":
             raise HTTPException(status_code=401, detail="Invalid token")
 
         user_id = int(payload.get("sub"))
+
+        exp = payload.get("exp")
+        if exp is not None and exp > time.time():
+            _token_cache.set(token, (user_id, exp), ttl=exp - time.time())
+
         return user_id
 
     except JWTError:
@@ -1,37 +1,44 @@
-from fastapi import APIRouter, HTTPException, Response, Request
+from fastapi import APIRouter, HTTPException, Response, Request, Depends
 from jose import JWTError, jwt
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-from app.DB import get_session
-from app.sql.sql_fxns import get_user_by_email, create_user
-from app.core.security import hash_password, verify_password, create_access_token, create_refresh_token, SECRET_KEY, ALGORITHM, ACCESS_EXPIRE_MIN, REFRESH_EXPIRE_DAYS
+from app.DB import get_async_session
+from app.sql.sql_fxns import get_user_by_email, create_user, update_user_password
+from app.core.security import ahash_password, averify_and_update_password, create_access_token, create_refresh_token, SECRET_KEY, ALGORITHM, ACCESS_EXPIRE_MIN, REFRESH_EXPIRE_DAYS
 
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
 @router.post("/signup")
-async def signup_user(user: dict):
+async def signup_user(user: dict, session: AsyncSession = Depends(get_async_session)):
     username = user.get("username")
     password = user.get("password")
 
     if not username or not password:
         return {"success": False, "message": "Email and password are required"}
 
-    existing_user = get_user_by_email( next(get_session()), username)
+    existing_user = await session.run_sync(get_user_by_email, username)
     if existing_user:
         return {"success": False, "message": "User already exists"}
 
-    create_user( next(get_session()),username, hash_password(password))
+    await session.run_sync(create_user, username, await ahash_password(password))
     return {"success": True, "message": "User created successfully"}
 
 @router.post("/signin")
-async def signin_user(user: dict, response: Response):
+async def signin_user(user: dict, response: Response, session: AsyncSession = Depends(get_async_session)):
     username = user.get("username")
     password = user.get("password")
 
-    existing_user = get_user_by_email(next(get_session()), username)
-    if not existing_user or not verify_password(password, existing_user.password):
+    existing_user = await session.run_sync(get_user_by_email, username)
+    if not existing_user or not password:
         raise HTTPException(status_code=401, detail="Invalid email or password")
 
+    valid, new_hash = await averify_and_update_password(password, existing_user.password)
+    if not valid:
+        raise HTTPException(status_code=401, detail="Invalid email or password")
+    if new_hash:
+        await session.run_sync(update_user_password, existing_user.user_id, new_hash)
+
     access_token = create_access_token(existing_user.user_id)
     refresh_token = create_refresh_token(existing_user.user_id)
 
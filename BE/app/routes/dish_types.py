@@ -1,12 +1,12 @@
 from fastapi import APIRouter, Depends
 
-from app.DB import get_session
-from sqlmodel import Session
+from app.DB import get_async_session
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.sql.sql_fxns import get_dish_types
 
 router = APIRouter(tags=["dish_type"])
 
 @router.get("/dish_type")
-async def get_dish_types_from_db(session: Session = Depends(get_session)):
-    return get_dish_types(session)
\ No newline at end of file
+async def get_dish_types_from_db(session: AsyncSession = Depends(get_async_session)):
+    return await session.run_sync(get_dish_types)
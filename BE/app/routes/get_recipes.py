@@ -1,25 +1,55 @@
-from fastapi import APIRouter, Depends
-from app.sql.sql_fxns import get_cookable_recipes_sql
-from app.DB import get_session
-from app.chains.retreive_recipe import get_full_recipe_by_id
-from sqlmodel import Session
+from fastapi import APIRouter, Depends, Query
+from typing import Optional
+from app.sql.sql_fxns import get_cookable_recipes_page_sql
+from app.DB import get_async_session
+from app.chains.retreive_recipe import get_full_recipes_by_ids, get_recipe_summaries
+from app.chains.cookable_recepies import get_almost_cookable_recipes
+from app.chains.recipe_matrix import aget_requirement_matrix
+from app.chains.ingredient_catalog import aget_ingredient_catalog
+from sqlmodel.ext.asyncio.session import AsyncSession
 from app.core.security import get_current_user
  
 router = APIRouter(tags=["get_recipes"])
+
+MAX_PAGE_SIZE = 200
  
 @router.get("/get_recipes")
-async def get_recipes(session: Session = Depends(get_session), user_id: int = Depends(get_current_user), dish_preference: str = "ALL"):
+async def get_recipes(session: AsyncSession = Depends(get_async_session), user_id: int = Depends(get_current_user), dish_preference: str = "ALL",
+                      after_recipe_id: Optional[int] = None, limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE), summary: bool = False):
+
+    dish_type_name = None if dish_preference == "ALL" else dish_preference
+
+    # fetch one extra id to know whether another page exists
+    recipe_ids = await session.run_sync(get_cookable_recipes_page_sql, user_id, dish_type_name=dish_type_name,
+                                        after_recipe_id=after_recipe_id, limit=limit + 1 if limit is not None else None)
+
+    next_after_recipe_id = None
+    if limit is not None and len(recipe_ids) > limit:
+        recipe_ids = recipe_ids[:limit]
+        next_after_recipe_id = recipe_ids[-1]
+
+    if summary:
+        out = await session.run_sync(get_recipe_summaries, recipe_ids)
+    else:
+        out = await session.run_sync(get_full_recipes_by_ids, recipe_ids)
+
+    return {
+        "count": len(out),
+        "recipes": out,
+        "next_after_recipe_id": next_after_recipe_id,
+    }
 
-    recipe_ids = get_cookable_recipes_sql(session, user_id)
 
-    out = []
-    for recipe_id in recipe_ids:
-        out.append(get_full_recipe_by_id(session, recipe_id))
+@router.get("/almost_cookable")
+async def almost_cookable(session: AsyncSession = Depends(get_async_session), user_id: int = Depends(get_current_user),
+                          limit: int = Query(10, ge=1, le=MAX_PAGE_SIZE), max_missing: Optional[int] = Query(None, ge=1)):
 
-    if dish_preference != "ALL":
-        out = [ r   for r in out    if r["dish_type"] == dish_preference]
+    matrix = await aget_requirement_matrix(session)
+    catalog = await aget_ingredient_catalog(session)
+    out = await session.run_sync(get_almost_cookable_recipes, user_id, k=limit, max_missing=max_missing,
+                                 matrix=matrix, catalog=catalog)
 
     return {
         "count": len(out),
-        "recipes": out
-    }
\ No newline at end of file
+        "recipes": out,
+    }
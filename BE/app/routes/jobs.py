@@ -0,0 +1,14 @@
+from fastapi import APIRouter, Depends, HTTPException
+
+from app.core.jobs import get_job
+from app.core.security import get_current_user
+
+router = APIRouter(prefix="/jobs", tags=["jobs"])
+
+@router.get("/{job_id}")
+async def job_status(job_id: str, user_id: int = Depends(get_current_user)):
+    job = await get_job(job_id)
+    # Other users' jobs look exactly like missing ones
+    if job is None or job.user_id != user_id:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
@@ -1,18 +1,119 @@
-from fastapi import APIRouter, UploadFile, File, Depends
+from fastapi import APIRouter, UploadFile, File, Depends, HTTPException
+from fastapi.responses import StreamingResponse, JSONResponse
+import asyncio
 import base64
+import json
+import os
 from app.chains.img_to_ingredients import img_to_ingredients_chain
+from app.chains.image_preprocess import apreprocess_image
+from app.chains.image_cache import image_analysis_cache
 from app.core.security import get_current_user
+from app.core.jobs import job_handler, submit_job, JobQueueFull
 
 router = APIRouter(tags=["meals"])
 
+MAX_IMAGES_PER_REQUEST = int(os.getenv("MAX_IMAGES_PER_REQUEST", "8"))
+MAX_IMAGE_BYTES = int(os.getenv("MAX_IMAGE_BYTES", str(10 * 1024 * 1024)))
+# Max vision calls in flight per request
+IMAGE_CONCURRENCY = int(os.getenv("IMAGE_CONCURRENCY", "4"))
+
+_READ_CHUNK = 1024 * 1024
+
+
+async def read_image_limited(image: UploadFile) -> bytes:
+    """
+    Read an upload in chunks, rejecting it as soon as it exceeds MAX_IMAGE_BYTES.
+    """
+    chunks = []
+    size = 0
+    while chunk := await image.read(_READ_CHUNK):
+        size += len(chunk)
+        if size > MAX_IMAGE_BYTES:
+            raise HTTPException(status_code=413, detail=f"{image.filename} exceeds {MAX_IMAGE_BYTES} bytes")
+        chunks.append(chunk)
+    return b"".join(chunks)
+
+
+async def analyze_image(image_bytes: bytes):
+    """
+    Downscale/re-encode the photo (off the event loop), then run the vision
+    chain unless the same normalized image was analyzed before.
+    """
+    try:
+        data, mime = await apreprocess_image(image_bytes)
+    except ValueError as e:
+        raise HTTPException(status_code=415, detail=str(e))
+
+    chain_input = {"image_base64": base64.b64encode(data).decode("utf-8"), "image_mime": mime}
+    return await image_analysis_cache.get_or_analyze(data, lambda: img_to_ingredients_chain.ainvoke(chain_input))
+
+
+async def stream_analysis(images: list[tuple[str, bytes]]):
+    """
+    Yield one NDJSON line per image as soon as its analysis completes.
+    """
+    semaphore = asyncio.Semaphore(IMAGE_CONCURRENCY)
+
+    async def analyze(index: int, filename: str, image_bytes: bytes) -> dict:
+        async with semaphore:
+            try:
+                result = await analyze_image(image_bytes)
+                return {"index": index, "filename": filename, "result": result.model_dump()}
+            except HTTPException as e:
+                return {"index": index, "filename": filename, "error": e.detail}
+            except Exception as e:
+                return {"index": index, "filename": filename, "error": str(e)}
+
+    tasks = [asyncio.create_task(analyze(i, name, data)) for i, (name, data) in enumerate(images)]
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            yield json.dumps(await next_done) + "\n"
+    finally:
+        # client went away: stop the remaining model calls
+        for task in tasks:
+            task.cancel()
+
+
+async def analyze_all(images: list[bytes]) -> list[dict]:
+    semaphore = asyncio.Semaphore(IMAGE_CONCURRENCY)
+
+    async def bounded(image_bytes: bytes):
+        async with semaphore:
+            return await analyze_image(image_bytes)
+
+    results = await asyncio.gather(*[bounded(data) for data in images])
+    return [r.model_dump() for r in results]
+
+
+@job_handler("easy_meals")
+async def easy_meals_job(user_id: int, payload: dict) -> list[dict]:
+    return await analyze_all([base64.b64decode(image["data"]) for image in payload["images"]])
+
+
 @router.post("/easy_meals")
-async def analyze_fridge(images: list[UploadFile] = File(...), user_id: int = Depends(get_current_user)):
-    imgs = []
+async def analyze_fridge(images: list[UploadFile] = File(...), user_id: int = Depends(get_current_user), stream: bool = False,
+                         async_job: bool = False):
+    if len(images) > MAX_IMAGES_PER_REQUEST:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_IMAGES_PER_REQUEST} images per request")
+
+    uploads = []
     for image in images:
-        image_bytes = await image.read()
-        image_base64 = base64.b64encode(image_bytes).decode("utf-8")
-        imgs.append({"image_base64": image_base64})
+        uploads.append((image.filename, await read_image_limited(image)))
 
-    results = img_to_ingredients_chain.batch(imgs)
     print("Authenticated user:", user_id)
-    return [r.model_dump() for r in results]
+
+    if async_job:
+        # base64 keeps the payload JSON-serializable for external brokers
+        payload = {"images": [
+            {"filename": name, "data": base64.b64encode(data).decode("ascii")} for name, data in uploads
+        ]}
+        try:
+            job = await submit_job("easy_meals", user_id, payload)
+        except JobQueueFull as e:
+            raise HTTPException(status_code=503, detail=str(e))
+        return JSONResponse(status_code=202, content={"job_id": job.id, "status": job.status})
+
+    if stream:
+        return StreamingResponse(stream_analysis(uploads), media_type="application/x-ndjson")
+
+    return await analyze_all([data for _, data in uploads])
@@ -0,0 +1,24 @@
+import os
+
+from fastapi import APIRouter, Depends
+
+from app.DB import get_pool_metrics
+from app.core.security import password_pool_stats, get_current_user
+from app.chains.image_cache import image_analysis_cache
+
+# Internal state: only mounted when enabled, and only for logged-in users
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "false").lower() in {"1", "true", "yes"}
+
+router = APIRouter(prefix="/metrics", tags=["metrics"], dependencies=[Depends(get_current_user)])
+
+@router.get("/db")
+async def db_pool_metrics():
+    return get_pool_metrics()
+
+@router.get("/password_hashing")
+async def password_hashing_metrics():
+    return password_pool_stats.snapshot()
+
+@router.get("/image_cache")
+async def image_cache_metrics():
+    return image_analysis_cache.stats()
@@ -3,7 +3,7 @@ from app.DB import get_session
 from app.chains.cookable_recepies import check_cookable_recipes
 from sqlmodel import Session
 from app.core.security import get_current_user
-from app.sql.sql_fxns import get_recipe_ingredients, reduce_user_ingredient
+from app.sql.sql_fxns import get_recipe_ingredients, reduce_user_ingredients_bulk
 
  
 router = APIRouter(tags=["eat_recipe"])
@@ -13,7 +13,7 @@ async def eat_recipe(session: Session = Depends(get_session), user_id: int = Dep
     if recipe_id == -1 or recipe_id <= 70:
         return 
     
-    for req in get_recipe_ingredients(session, recipe_id):
-        reduce_user_ingredient(session, user_id, req.ingredient_id, req.amount)
+    requirements = get_recipe_ingredients(session, recipe_id)
+    reduce_user_ingredients_bulk(session, user_id, [(req.ingredient_id, req.amount) for req in requirements])
 
-    check_cookable_recipes(session, user_id)
\ No newline at end of file
+    check_cookable_recipes(session, user_id, [req.ingredient_id for req in requirements])
\ No newline at end of file
@@ -1,28 +1,57 @@
-from fastapi import APIRouter, Depends
-from typing import Dict
-from app.chains.translate_to_ingredients_set_units import verifying_ingredients_chain, clean_for_sqlmodel, IngredientInput
-from app.chains.cookable_recepies import get_cookable_recipes
-from app.sql.sql_fxns import add_user_ingredient, store_cookable_recipes
-from app.DB import get_session
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import JSONResponse
+from typing import Dict, List
+from app.chains.translate_to_ingredients_set_units import averifying_ingredients_chain, clean_for_sqlmodel, IngredientInput
+from app.chains.cookable_recepies import update_cookable_recipes
+from app.sql.sql_fxns import add_user_ingredients_bulk, get_cookable_recipes_sql
+from app.DB import get_async_session, async_engine
 from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 from app.core.security import get_current_user
+from app.core.jobs import job_handler, submit_job, JobQueueFull
  
 router = APIRouter(tags=["verify"])
+
+
+def store_verified_ingredients(session: Session, user_id: int, cleaned: List[Dict]) -> List[int]:
+    """
+    Add the verified ingredients to the pantry and update the cookable
+    recipes affected by them. Returns all cookable recipe ids.
+    """
+    add_user_ingredients_bulk(session, user_id, [(row["ingredient_id"], row["amount"]) for row in cleaned])
+
+    update_cookable_recipes(session, user_id, [row["ingredient_id"] for row in cleaned])
+    return list(get_cookable_recipes_sql(session, user_id))
  
+
+async def run_verify(session: AsyncSession, user_id: int, user_input: Dict[str, str]):
+    rows = await averifying_ingredients_chain(session, user_input)
+    cleaned = clean_for_sqlmodel(rows)
+
+    out = await session.run_sync(store_verified_ingredients, user_id, cleaned)
+
+    return cleaned, out
+
+
+@job_handler("verify")
+async def verify_job(user_id: int, payload: Dict) -> List:
+    async with AsyncSession(async_engine, expire_on_commit=False) as session:
+        cleaned, out = await run_verify(session, user_id, payload["items"])
+    return [cleaned, out]
+
 @router.post("/verify")
-async def verify(items: list[IngredientInput], user_id: int = Depends(get_current_user), session: Session = Depends(get_session)):
+async def verify(items: list[IngredientInput], user_id: int = Depends(get_current_user), session: AsyncSession = Depends(get_async_session),
+                 async_job: bool = False):
     
     result = {}
     for item in items:
         result[item.ingredient] = item.quantity
- 
-    rows = verifying_ingredients_chain(session, result)
-    cleaned = clean_for_sqlmodel(rows)
- 
-    for row in cleaned:
-        add_user_ingredient( session=session, user_id=user_id, ingredient_id=row["ingredient_id"], amount=row["amount"])
-
-    out = get_cookable_recipes(session, user_id)
-    store_cookable_recipes(session=session, user_id=user_id, recipe_ids=out)
 
-    return cleaned, out
\ No newline at end of file
+    if async_job:
+        try:
+            job = await submit_job("verify", user_id, {"items": result})
+        except JobQueueFull as e:
+            raise HTTPException(status_code=503, detail=str(e))
+        return JSONResponse(status_code=202, content={"job_id": job.id, "status": job.status})
+ 
+    return await run_verify(session, user_id, result)
@@ -1,14 +1,37 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from sqlmodel import Session
+from app.DB import engine
+from app.chains.ingredient_catalog import get_ingredient_catalog
+from app.chains.recipe_matrix import get_requirement_matrix
+from app.core.jobs import start_job_workers, stop_job_workers
 from app.routes.auth import router as auth_router
 from app.routes.meals import router as meals_router
 from app.routes.verify import router as verify_router
 from app.routes.dish_types import router as dish_type_router
 from app.routes.get_recipes import router as get_recipes_router
 from app.routes.rmv_ingredients import router as rmv_ingredients
+from app.routes.metrics import router as metrics_router, METRICS_ENABLED
+from app.routes.jobs import router as jobs_router
 
 
-app = FastAPI(title="EASY MEAL API")
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Warm the in-process snapshots so the first requests don't pay for them
+    try:
+        with Session(engine) as session:
+            get_ingredient_catalog(session)
+            get_requirement_matrix(session)
+    except Exception as e:
+        print(f"[WARN] Could not warm ingredient catalog / recipe matrix: {e}")
+
+    start_job_workers()
+    yield
+    await stop_job_workers()
+
+
+app = FastAPI(title="EASY MEAL API", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -24,6 +47,9 @@ app.include_router(verify_router)
 app.include_router(dish_type_router)
 app.include_router(get_recipes_router)
 app.include_router(rmv_ingredients)
+if METRICS_ENABLED:
+    app.include_router(metrics_router)
+app.include_router(jobs_router)
 
 if __name__ == "__main__":
     import uvicorn
@@ -1,8 +1,19 @@
-from sqlmodel import Session, select, delete
-from  typing import List, Tuple
+from sqlmodel import Session, select, delete, update, func, case
+from sqlalchemy import tuple_, cast, String, literal_column
+from sqlalchemy.dialects.postgresql import insert as pg_insert, aggregate_order_by
+from  typing import Dict, List, Tuple, Optional
 
 from app.sql.sql_models import *
 
+# Seed recipes 71-83 ship without recipe_ingredients rows, so they are kept out
+# of cookability. Every other recipe, including ones added later by a catalog
+# import (identity ids > 83), is included.
+SEED_RECIPES_WITHOUT_INGREDIENTS = (71, 83)
+
+def cookable_recipe_filter(recipe_id_column):
+    first, last = SEED_RECIPES_WITHOUT_INGREDIENTS
+    return ~recipe_id_column.between(first, last)
+
 def get_ingredient_table(session: Session):
     statement = select(Ingredient)
     return session.exec(statement).all()
@@ -36,6 +47,81 @@ def set_user_ingredient(session: Session, user_id: int, ingredient_id: int, amou
         session.add(new_row)
     session.commit()
 
+# =========================================================
+# ---------------- Bulk Pantry Writes ---------------------
+# =========================================================
+# One statement per call, so concurrent updates of the same pantry row are
+# applied atomically by Postgres instead of read-modify-write in Python.
+# Requires UNIQUE (user_id, ingredient_id) on ingredients_stored.
+
+def _merge_amounts(rows: List[Tuple[int, float]], keep_last: bool = False) -> Dict[int, float]:
+    """
+    ON CONFLICT may touch a row only once per statement: merge duplicate ingredient_ids.
+    """
+    merged: Dict[int, float] = {}
+    for ingredient_id, amount in rows:
+        if keep_last:
+            merged[ingredient_id] = amount
+        else:
+            merged[ingredient_id] = merged.get(ingredient_id, 0) + amount
+    return merged
+
+def add_user_ingredients_bulk(session: Session, user_id: int, rows: List[Tuple[int, float]]):
+    """
+    Add (ingredient_id, delta) pairs to the pantry with one INSERT ... ON CONFLICT DO UPDATE.
+    """
+    merged = _merge_amounts(rows)
+    if not merged:
+        return
+    stmt = pg_insert(StoredIngredients).values([
+        {"user_id": user_id, "ingredient_id": ingredient_id, "amount": amount}
+        for ingredient_id, amount in merged.items()
+    ])
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[StoredIngredients.user_id, StoredIngredients.ingredient_id],
+        set_={"amount": StoredIngredients.amount + stmt.excluded.amount},
+    )
+    session.exec(stmt)
+    session.commit()
+
+def set_user_ingredients_bulk(session: Session, user_id: int, rows: List[Tuple[int, float]]):
+    """
+    Set (ingredient_id, amount) pairs in the pantry with one INSERT ... ON CONFLICT DO UPDATE.
+    """
+    merged = _merge_amounts(rows, keep_last=True)
+    if not merged:
+        return
+    stmt = pg_insert(StoredIngredients).values([
+        {"user_id": user_id, "ingredient_id": ingredient_id, "amount": amount}
+        for ingredient_id, amount in merged.items()
+    ])
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[StoredIngredients.user_id, StoredIngredients.ingredient_id],
+        set_={"amount": stmt.excluded.amount},
+    )
+    session.exec(stmt)
+    session.commit()
+
+def reduce_user_ingredients_bulk(session: Session, user_id: int, rows: List[Tuple[int, float]]):
+    """
+    Consume (ingredient_id, amount) pairs: one UPDATE decrementing every row,
+    then one DELETE of the rows that ran out, in a single transaction.
+    """
+    merged = _merge_amounts(rows)
+    if not merged:
+        return
+    ids = list(merged)
+    session.exec(
+        update(StoredIngredients)
+        .where(StoredIngredients.user_id == user_id, StoredIngredients.ingredient_id.in_(ids))
+        .values(amount=StoredIngredients.amount - case(merged, value=StoredIngredients.ingredient_id, else_=0))
+    )
+    session.exec(
+        delete(StoredIngredients)
+        .where(StoredIngredients.user_id == user_id, StoredIngredients.ingredient_id.in_(ids), StoredIngredients.amount <= 0)
+    )
+    session.commit()
+
 def get_user_by_email(session: Session, user_email: str):
     statement = select(User).where(User.username == user_email)
     return session.exec(statement).first()
@@ -45,6 +131,13 @@ def create_user(session: Session, user_email: str, hashed_password: str):
     session.add(new_user)
     session.commit()
 
+def update_user_password(session: Session, user_id: int, hashed_password: str):
+    user = session.get(User, user_id)
+    if not user:
+        return
+    user.password = hashed_password
+    session.commit()
+
 
 def get_user_ingredients(session: Session, user_id: int):
     stmt = select(StoredIngredients).where(StoredIngredients.user_id == user_id)
@@ -54,8 +147,71 @@ def get_recipe_ingredients(session: Session, recipe_id: int):
     stmt = select(RecipeIngredient).where(RecipeIngredient.recipe_id == recipe_id)
     return session.exec(stmt).all()
 
+def get_all_recipe_ingredients(session: Session):
+    stmt = select(RecipeIngredient).where(cookable_recipe_filter(RecipeIngredient.recipe_id))
+    return session.exec(stmt).all()
+
 def get_all_recipes(session: Session):
-    return session.exec(select(Recipe).where(Recipe.recipe_id <= 70)).all()
+    return session.exec(select(Recipe).where(cookable_recipe_filter(Recipe.recipe_id))).all()
+
+def get_recipe_ids_using_sql(session: Session, ingredient_ids: List[int]) -> List[int]:
+    if not ingredient_ids:
+        return []
+    stmt = (
+        select(RecipeIngredient.recipe_id)
+        .where(RecipeIngredient.ingredient_id.in_(ingredient_ids), cookable_recipe_filter(RecipeIngredient.recipe_id))
+        .distinct()
+        .order_by(RecipeIngredient.recipe_id)
+    )
+    return session.exec(stmt).all()
+
+def get_recipe_requirements_fingerprint(session: Session) -> Tuple:
+    """
+    md5 of every (recipe_id) and (recipe_id, ingredient_id, amount) row, in
+    a stable order: changes on any insert, delete or edit of recipes or their
+    requirements. One round trip, aggregated server-side.
+    """
+    recipe_rows = func.string_agg(
+        cast(Recipe.recipe_id, String),
+        aggregate_order_by(literal_column("','"), Recipe.recipe_id),
+    )
+    requirement_rows = func.string_agg(
+        func.concat(RecipeIngredient.recipe_id, ":", RecipeIngredient.ingredient_id, ":", RecipeIngredient.amount),
+        aggregate_order_by(literal_column("','"), RecipeIngredient.recipe_id, RecipeIngredient.ingredient_id, RecipeIngredient.amount),
+    )
+    recipes = select(func.md5(func.coalesce(recipe_rows, ""))).where(cookable_recipe_filter(Recipe.recipe_id))
+    requirements = (
+        select(func.md5(func.coalesce(requirement_rows, "")))
+        .where(cookable_recipe_filter(RecipeIngredient.recipe_id))
+    )
+    return session.exec(select(recipes.scalar_subquery(), requirements.scalar_subquery())).one()
+
+def get_cookable_recipe_ids_sql(session: Session, user_id: int, recipe_ids: Optional[List[int]] = None) -> List[int]:
+    """
+    Set-based cookability: one query joining recipe requirements against the
+    user's stock, keeping recipes where no requirement is short.
+    recipe_ids restricts the check to those recipes.
+    """
+    stock = (
+        select(StoredIngredients.ingredient_id, func.sum(StoredIngredients.amount).label("amount"))
+        .where(StoredIngredients.user_id == user_id)
+        .group_by(StoredIngredients.ingredient_id)
+        .subquery()
+    )
+    missing = case((func.coalesce(stock.c.amount, 0) < RecipeIngredient.amount, 1), else_=0)
+
+    stmt = (
+        select(Recipe.recipe_id)
+        .outerjoin(RecipeIngredient, RecipeIngredient.recipe_id == Recipe.recipe_id)
+        .outerjoin(stock, stock.c.ingredient_id == RecipeIngredient.ingredient_id)
+        .where(cookable_recipe_filter(Recipe.recipe_id))
+        .group_by(Recipe.recipe_id)
+        .having(func.sum(missing) == 0)
+        .order_by(Recipe.recipe_id)
+    )
+    if recipe_ids is not None:
+        stmt = stmt.where(Recipe.recipe_id.in_(recipe_ids))
+    return session.exec(stmt).all()
 
 def get_dish_types(session: Session):
     return session.exec(select(DishType)).all()
@@ -73,5 +229,113 @@ def store_cookable_recipes(session : Session, user_id:int, recipe_ids:List[int])
 def get_cookable_recipes_sql(session: Session, user_id: int):
     return session.exec(select(Cookable_recipes.recipe_id).where(Cookable_recipes.user_id == user_id)).all()
 
+def get_cookable_recipes_page_sql(session: Session, user_id: int, dish_type_name: Optional[str] = None,
+                                  after_recipe_id: Optional[int] = None, limit: Optional[int] = None) -> List[int]:
+    """
+    Cookable recipe ids ordered by recipe_id, optionally filtered by dish type
+    and paginated by keyset (recipe_id > after_recipe_id).
+    """
+    stmt = select(Cookable_recipes.recipe_id).where(Cookable_recipes.user_id == user_id)
+    if dish_type_name is not None:
+        stmt = (
+            stmt.join(Recipe, Recipe.recipe_id == Cookable_recipes.recipe_id)
+            .join(DishType, DishType.dish_type_id == Recipe.dish_type_id)
+            .where(DishType.dish_type_name == dish_type_name)
+        )
+    if after_recipe_id is not None:
+        stmt = stmt.where(Cookable_recipes.recipe_id > after_recipe_id)
+    stmt = stmt.order_by(Cookable_recipes.recipe_id)
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    return session.exec(stmt).all()
+
 def rmv_frm_cookable_sql(session: Session, user_id: int, recipe_id: int):
     session.exec(delete(Cookable_recipes).where(Cookable_recipes.user_id == user_id, Cookable_recipes.recipe_id == recipe_id))
+
+def get_cookable_recipes_among_sql(session: Session, user_id: int, recipe_ids: List[int]):
+    if not recipe_ids:
+        return []
+    return session.exec(select(Cookable_recipes.recipe_id).where(Cookable_recipes.user_id == user_id, Cookable_recipes.recipe_id.in_(recipe_ids))).all()
+
+def add_cookable_recipes_sql(session: Session, user_id: int, recipe_ids: List[int]):
+    """
+    ON CONFLICT DO NOTHING: a concurrent update of the same pantry may have
+    added the same rows already.
+    """
+    add_cookable_pairs_bulk(session, [(user_id, recipe_id) for recipe_id in recipe_ids])
+
+def rmv_cookable_recipes_sql(session: Session, user_id: int, recipe_ids: List[int]):
+    if not recipe_ids:
+        return
+    session.exec(delete(Cookable_recipes).where(Cookable_recipes.user_id == user_id, Cookable_recipes.recipe_id.in_(recipe_ids)))
+
+# =========================================================
+# ---- Bulk Cookable Recomputation ----
+# =========================================================
+
+def get_user_ids_page(session: Session, after_user_id: int, limit: int) -> List[int]:
+    stmt = select(User.user_id).where(User.user_id > after_user_id).order_by(User.user_id).limit(limit)
+    return session.exec(stmt).all()
+
+def get_cookable_pairs_for_users_sql(session: Session, user_ids: List[int]) -> List[Tuple[int, int]]:
+    """
+    (user_id, recipe_id) for every recipe the given users can cook, in one query:
+    a recipe is cookable when every one of its requirements is covered by stock.
+    Recipes without requirements are left to the caller.
+    """
+    if not user_ids:
+        return []
+    stock = (
+        select(
+            StoredIngredients.user_id,
+            StoredIngredients.ingredient_id,
+            func.sum(StoredIngredients.amount).label("amount"),
+        )
+        .where(StoredIngredients.user_id.in_(user_ids))
+        .group_by(StoredIngredients.user_id, StoredIngredients.ingredient_id)
+        .subquery()
+    )
+    requirement_counts = (
+        select(RecipeIngredient.recipe_id, func.count().label("required"))
+        .where(cookable_recipe_filter(RecipeIngredient.recipe_id))
+        .group_by(RecipeIngredient.recipe_id)
+        .subquery()
+    )
+    stmt = (
+        select(stock.c.user_id, RecipeIngredient.recipe_id)
+        .join(RecipeIngredient, RecipeIngredient.ingredient_id == stock.c.ingredient_id)
+        .join(requirement_counts, requirement_counts.c.recipe_id == RecipeIngredient.recipe_id)
+        .where(stock.c.amount >= RecipeIngredient.amount)
+        .group_by(stock.c.user_id, RecipeIngredient.recipe_id, requirement_counts.c.required)
+        .having(func.count() == requirement_counts.c.required)
+    )
+    return [(user_id, recipe_id) for user_id, recipe_id in session.exec(stmt).all()]
+
+def get_recipes_without_requirements_sql(session: Session) -> List[int]:
+    stmt = (
+        select(Recipe.recipe_id)
+        .outerjoin(RecipeIngredient, RecipeIngredient.recipe_id == Recipe.recipe_id)
+        .where(cookable_recipe_filter(Recipe.recipe_id), RecipeIngredient.recipe_id.is_(None))
+    )
+    return session.exec(stmt).all()
+
+def get_cookable_pairs_sql(session: Session, user_ids: List[int]) -> List[Tuple[int, int]]:
+    if not user_ids:
+        return []
+    stmt = select(Cookable_recipes.user_id, Cookable_recipes.recipe_id).where(Cookable_recipes.user_id.in_(user_ids))
+    return [(user_id, recipe_id) for user_id, recipe_id in session.exec(stmt).all()]
+
+def add_cookable_pairs_bulk(session: Session, pairs: List[Tuple[int, int]]):
+    if not pairs:
+        return
+    stmt = pg_insert(Cookable_recipes).values([
+        {"user_id": user_id, "recipe_id": recipe_id} for user_id, recipe_id in pairs
+    ])
+    session.exec(stmt.on_conflict_do_nothing(index_elements=[Cookable_recipes.user_id, Cookable_recipes.recipe_id]))
+
+def rmv_cookable_pairs_bulk(session: Session, pairs: List[Tuple[int, int]]):
+    if not pairs:
+        return
+    session.exec(delete(Cookable_recipes).where(
+        tuple_(Cookable_recipes.user_id, Cookable_recipes.recipe_id).in_(pairs)
+    ))
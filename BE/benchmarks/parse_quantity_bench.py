@@ -0,0 +1,49 @@
+"""
+Micro-benchmark: compiled parse_quantity vs the original per-call regex.
+
+Run from BE/:
+    python -m benchmarks.parse_quantity_bench
+"""
+
+import os
+import re
+import timeit
+
+os.environ.setdefault("LLM_PROVIDER", "fake")
+
+from app.chains.translate_to_ingredients_set_units import normalize_unit, parse_quantity
+
+
+SIMPLE = ["5 kg", "05 Kg", "2cups", "1 tbsp", "250 ml"]
+EXTENDED = ["1/2 cup", "1 ½ tbsp", "1-2 cups", "2x500g", "a dozen eggs", "3"]
+NUMBER = 200_000
+
+
+def legacy_parse_quantity(text):
+    pattern = re.compile(r"(\d+(?:\.\d+)?)\s*([a-zA-Z]+)")
+    match = pattern.search(text.lower())
+
+    if not match:
+        return None, None
+
+    value = float(match.group(1))
+    unit = normalize_unit(match.group(2))
+    return value, unit
+
+
+def bench(fn, samples):
+    seconds = timeit.timeit(lambda: [fn(s) for s in samples], number=NUMBER // len(samples))
+    return seconds / NUMBER * 1e6
+
+
+def main():
+    print(f"{'us/call':<10}{'simple':>10}{'extended':>10}")
+    for name, fn in [("legacy", legacy_parse_quantity), ("compiled", parse_quantity)]:
+        print(f"{name:<10}{bench(fn, SIMPLE):>10.2f}{bench(fn, EXTENDED):>10.2f}")
+    print()
+    for s in SIMPLE + EXTENDED:
+        print(f"{s!r:<16} legacy={legacy_parse_quantity(s)!s:<22} new={parse_quantity(s)}")
+
+
+if __name__ == "__main__":
+    main()
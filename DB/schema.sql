@@ -142,6 +142,7 @@ CREATE TABLE ingredients_stored (
     user_id INT,
     ingredient_id INT,
     amount NUMERIC NOT NULL,
+    UNIQUE (user_id, ingredient_id),
     FOREIGN KEY (user_id) REFERENCES users(user_id),
     FOREIGN KEY (ingredient_id) REFERENCES ingredients(ingredient_id)
 );
@@ -151,6 +152,7 @@ CREATE TABLE Cookable_recipes (
     id INT GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
     user_id INT,
     recipe_id INT,
+    UNIQUE (user_id, recipe_id),
     FOREIGN KEY (user_id) REFERENCES users(user_id),
     FOREIGN KEY (recipe_id) REFERENCES recipes(recipe_id)
 );
\ No newline at end of file